@@ -0,0 +1,49 @@
+"""
+Time BFS on synthetic graphs of growing size where the goal is unreachable,
+so the whole graph is explored. The original BFS (list.pop(0), marking pages
+when popped) is included for comparison.
+
+Usage:
+    python -m benchmarks.bench_bfs [max_nodes]
+"""
+import sys
+import time
+
+from benchmarks.synthetic import SyntheticInternet
+from py_wikiracer.wikiracer import BFSProblem, Parser
+
+
+def legacy_bfs(internet, source, goal):
+    visited = set()
+    queue = [(source, [source])]
+    while queue:
+        (vertex, path) = queue.pop(0)
+        visited.add(vertex)
+        for next in Parser.get_links_in_page(internet.get_page(vertex)):
+            if next not in visited:
+                if next == goal:
+                    return path + [next]
+                queue.append((next, path + [next]))
+    return None
+
+
+def run(search, n):
+    internet = SyntheticInternet(n, degree=4)
+    start = time.perf_counter()
+    search(internet, "/wiki/Node_0", "/wiki/Missing")
+    return time.perf_counter() - start, len(internet.requests)
+
+
+def main(argv):
+    max_nodes = int(argv[1]) if len(argv) > 1 else 4000
+    n = 500
+    print(f"{'nodes':>8} {'legacy s':>10} {'legacy requests':>16} {'bfs s':>8} {'bfs requests':>13}")
+    while n <= max_nodes:
+        legacy_time, legacy_requests = run(legacy_bfs, n)
+        bfs_time, bfs_requests = run(lambda internet, s, g: BFSProblem(internet).bfs(s, g), n)
+        print(f"{n:8} {legacy_time:10.3f} {legacy_requests:16} {bfs_time:8.3f} {bfs_requests:13}")
+        n *= 2
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,60 @@
+"""
+Compare the one-file-per-page cache directory with SQLiteCacheStore: bulk
+import time, on-disk size and random lookup latency.
+
+Usage:
+    python -m benchmarks.bench_cache_store [cache_dir]
+
+Uses the pages in cache_dir (wiki_cache by default), or a synthetic corpus
+written to a temporary directory when that cache is empty.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.bench_parser import synthetic_page
+from py_wikiracer.cache_store import DirectoryCacheStore, SQLiteCacheStore
+from py_wikiracer.internet import FILE_CACHE_DIR
+
+
+def disk_usage(path):
+    path = Path(path)
+    files = path.iterdir() if path.is_dir() else [path, Path(f"{path}-wal")]
+    return sum(os.stat(f).st_blocks * 512 for f in files if f.exists())
+
+
+def time_lookups(store, pages, n=2000):
+    rng = random.Random(0)
+    sample = [rng.choice(pages) for _ in range(n)]
+    start = time.perf_counter()
+    for page, at_time in sample:
+        store.get(page, at_time)
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def main(argv):
+    with tempfile.TemporaryDirectory() as temp:
+        directory = DirectoryCacheStore(argv[1] if len(argv) > 1 else FILE_CACHE_DIR)
+        if not any(True for _ in directory.entries()):
+            directory = DirectoryCacheStore(Path(temp) / "wiki_cache")
+            rng = random.Random(0)
+            for i in range(500):
+                directory.put(f"/wiki/Page_{i}", None, synthetic_page(rng, 300))
+        pages = [(page, None if at_time == "None" else at_time) for page, at_time, _ in directory.entries()]
+
+        store = SQLiteCacheStore(Path(temp) / "wiki_cache.sqlite")
+        start = time.perf_counter()
+        store.import_directory(directory.path)
+        print(f"imported {len(pages)} pages in {time.perf_counter() - start:.2f}s")
+
+        print(f"{'':10} {'disk MB':>9} {'lookup us':>10}")
+        for name, backend, path in (("directory", directory, directory.path), ("sqlite", store, store.path)):
+            print(f"{name:10} {disk_usage(path) / 2 ** 20:9.1f} {time_lookups(backend, pages):10.1f}")
+        store.close()
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,64 @@
+"""
+Microbenchmark DijkstrasProblem against the original implementation (path
+copies, float("inf") placeholders, path comparisons on ties, stale entries
+re-expanded) on hub-heavy synthetic graphs.
+
+Usage:
+    python -m benchmarks.bench_dijkstra [n_nodes]
+"""
+import sys
+import time
+from heapq import heapify, heappop, heappush
+
+from benchmarks.synthetic import SyntheticInternet
+from py_wikiracer.wikiracer import DijkstrasProblem, Parser
+
+
+def legacy_dijkstras(internet, source, goal, costFn):
+    visited = set()
+    heap = list()
+    heapify(heap)
+    heappush(heap, (0, source, [source]))
+    lowest_cost = {source: 0}
+    while heap:
+        (cost, vertex, path) = heappop(heap)
+        visited.add(vertex)
+        for neighbor in Parser.get_links_in_page(internet.get_page(vertex)):
+            if neighbor not in visited:
+                neighbor_path = path + [neighbor]
+                if neighbor == goal:
+                    return neighbor_path
+                if neighbor not in lowest_cost.keys():
+                    lowest_cost[neighbor] = float("inf")
+                neighbor_cost = cost + costFn(vertex, neighbor)
+                if neighbor_cost < lowest_cost[neighbor]:
+                    lowest_cost[neighbor] = neighbor_cost
+                    heappush(heap, (lowest_cost[neighbor], neighbor, neighbor_path))
+    return None
+
+
+def run(search, n):
+    internet = SyntheticInternet(n, degree=30, hubs=50, hub_fraction=0.5)
+    calls = [0]
+    def costFn(x, y):
+        calls[0] += 1
+        return 1 + len(y) % 3
+    start = time.perf_counter()
+    path = search(internet, "/wiki/Node_100", "/wiki/Missing", costFn)
+    return time.perf_counter() - start, len(internet.requests), calls[0], path
+
+
+def main(argv):
+    max_nodes = int(argv[1]) if len(argv) > 1 else 20000
+    print(f"{'nodes':>7} {'':9} {'seconds':>8} {'requests':>9} {'costFn calls':>13}")
+    n = 2500
+    while n <= max_nodes:
+        for name, search in (("legacy", legacy_dijkstras),
+                             ("current", lambda internet, s, g, c: DijkstrasProblem(internet).dijkstras(s, g, c))):
+            seconds, requests, calls, _ = run(search, n)
+            print(f"{n:7} {name:9} {seconds:8.2f} {requests:9} {calls:13}")
+        n *= 2
+
+
+if __name__ == "__main__":
+    main(sys.argv)
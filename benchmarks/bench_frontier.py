@@ -0,0 +1,51 @@
+"""
+Measure frontier memory for path-list entries against SearchState entries.
+
+Usage:
+    python -m benchmarks.bench_frontier [n_entries] [depth ...]
+"""
+import sys
+import tracemalloc
+from array import array
+
+from py_wikiracer.search_state import SearchState
+
+
+def titles(n):
+    return [f"/wiki/Page_{i}" for i in range(n)]
+
+
+def path_frontier(names, depth):
+    prefix = names[:depth]
+    return [(name, prefix + [name]) for name in names]
+
+
+def state_frontier(names, depth):
+    state = SearchState()
+    parent = SearchState.ROOT
+    for name in names[:depth]:
+        parent = state.push(name, parent)
+    return state, array("l", (state.push(name, parent) for name in names))
+
+
+def measure(fn, *args):
+    tracemalloc.start()
+    result = fn(*args)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def main(argv):
+    n = int(argv[1]) if len(argv) > 1 else 10 ** 6
+    names = titles(n)
+    print(f"{n} frontier entries, title strings excluded")
+    for depth in (argv[2:] or (3, 10)):
+        depth = int(depth)
+        print(f"depth {depth:3}  path lists:  {measure(path_frontier, names, depth) / 2 ** 20:8.1f} MB")
+        print(f"depth {depth:3}  SearchState: {measure(state_frontier, names, depth) / 2 ** 20:8.1f} MB")
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,66 @@
+"""
+Compare BFS against A* with landmark (ALT) lower bounds on a saved corpus:
+pages expanded per race and path length.
+
+Usage:
+    python -m benchmarks.bench_landmarks [cache_dir] [n_races]
+
+The link graph is built from the pages in cache_dir (wiki_cache by default),
+or from a hub-heavy synthetic graph when the cache is empty.
+"""
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.synthetic import SyntheticInternet
+from py_wikiracer.internet import FILE_CACHE_DIR, cached_pages
+from py_wikiracer.landmarks import Landmarks, build_landmarks
+from py_wikiracer.link_graph import LinkGraph, LinkGraphInternet, build_from_file_cache, build_link_graph
+from py_wikiracer.wikiracer import BFSProblem, DijkstrasProblem
+
+
+def main(argv):
+    cache_dir = argv[1] if len(argv) > 1 else FILE_CACHE_DIR
+    n_races = int(argv[2]) if len(argv) > 2 else 20
+    with tempfile.TemporaryDirectory() as temp:
+        graph_path, landmark_path = Path(temp) / "graph", Path(temp) / "landmarks"
+        if any(True for _ in cached_pages(cache_dir)):
+            build_from_file_cache(graph_path, cache_dir)
+        else:
+            synthetic = SyntheticInternet(20000, degree=8, hubs=100, hub_fraction=0.2)
+            build_link_graph({f"/wiki/Node_{i}": synthetic.links(f"/wiki/Node_{i}") for i in range(synthetic.n)}, graph_path)
+        graph = LinkGraph(graph_path)
+        start = time.perf_counter()
+        build_landmarks(graph, landmark_path)
+        print(f"{len(graph)} pages; landmarks built in {time.perf_counter() - start:.1f}s")
+        landmarks = Landmarks(graph, landmark_path)
+
+        rng = random.Random(0)
+        races = list()
+        while len(races) < n_races:
+            source, goal = graph.title(rng.randrange(len(graph))), graph.title(rng.randrange(len(graph)))
+            if source != goal and graph.shortest_path(source, goal):
+                races.append((source, goal))
+
+        totals = {"bfs": [0, 0, 0.0], "alt": [0, 0, 0.0]}
+        for source, goal in races:
+            for name in totals:
+                internet = LinkGraphInternet(graph)
+                start = time.perf_counter()
+                if name == "bfs":
+                    path = BFSProblem(internet).bfs(source, goal)
+                else:
+                    path = DijkstrasProblem(internet).dijkstras(source, goal, costFn=lambda x, y: 1, heuristicFn=landmarks.heuristic(goal))
+                totals[name][0] += len(internet.requests)
+                totals[name][1] += len(path) - 1
+                totals[name][2] += time.perf_counter() - start
+        for name, (expanded, clicks, seconds) in totals.items():
+            print(f"{name}: {expanded / n_races:8.1f} pages expanded, {clicks / n_races:4.2f} clicks, {seconds / n_races * 1000:7.1f}ms per race")
+        landmarks.close()
+        graph.close()
+
+
+if __name__ == "__main__":
+    main(sys.argv)
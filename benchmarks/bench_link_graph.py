@@ -0,0 +1,44 @@
+"""
+Build a LinkGraph from a synthetic graph and time searches against it.
+
+Usage:
+    python -m benchmarks.bench_link_graph [n_nodes] [degree]
+"""
+import random
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import SyntheticInternet
+from py_wikiracer.link_graph import LinkGraph, LinkGraphInternet, build_link_graph
+from py_wikiracer.wikiracer import BFSProblem
+
+
+def main(argv):
+    n = int(argv[1]) if len(argv) > 1 else 200000
+    degree = int(argv[2]) if len(argv) > 2 else 10
+    synthetic = SyntheticInternet(n, degree)
+    with tempfile.TemporaryDirectory() as path:
+        start = time.perf_counter()
+        build_link_graph({f"/wiki/Node_{i}": synthetic.links(f"/wiki/Node_{i}") for i in range(n)}, path)
+        print(f"built {n} nodes, {n * degree} edges in {time.perf_counter() - start:.1f}s")
+
+        start = time.perf_counter()
+        graph = LinkGraph(path)
+        print(f"opened in {(time.perf_counter() - start) * 1000:.2f}ms")
+
+        rng = random.Random(1)
+        races = [(f"/wiki/Node_{rng.randrange(n)}", f"/wiki/Node_{rng.randrange(n)}") for _ in range(10)]
+        start = time.perf_counter()
+        lengths = [len(graph.shortest_path(source, goal) or []) for source, goal in races]
+        print(f"shortest_path: {(time.perf_counter() - start) / len(races) * 1000:8.1f}ms per race, path lengths {lengths}")
+
+        start = time.perf_counter()
+        for source, goal in races[:3]:
+            BFSProblem(LinkGraphInternet(graph)).bfs(source, goal)
+        print(f"BFSProblem:    {(time.perf_counter() - start) / 3 * 1000:8.1f}ms per race")
+        graph.close()
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,52 @@
+"""
+Train a LinkModel on one set of races and compare the racer's downloads with
+and without it on a held-out set. The corpus is wiki_cache if it has enough
+recorded races, otherwise a synthetic scale-free graph.
+
+Usage:
+    python -m benchmarks.bench_link_model [pages]
+"""
+import sys
+import tempfile
+
+from benchmarks.suite import recorded_races
+from py_wikiracer.link_graph import LinkGraph, build_from_file_cache, build_link_graph
+from py_wikiracer.link_model import graph_features, train_link_model
+from py_wikiracer.offline import OfflineInternet, ScaleFreeInternet
+from py_wikiracer.wikiracer import WikiracerProblem
+
+
+def downloads(internet_factory, races, model):
+    total = solved = 0
+    for source, goal in races:
+        internet = internet_factory()
+        solved += WikiracerProblem(internet, model=model).wikiracer(source, goal) is not None
+        total += len(internet.requests)
+    return total / len(races), solved
+
+
+def main(argv):
+    n = int(argv[1]) if len(argv) > 1 else 5000
+    with tempfile.TemporaryDirectory() as tmp:
+        races = recorded_races(300, 3)
+        if len(races) >= 100:
+            build_from_file_cache(tmp)
+            internet_factory, description = OfflineInternet, "pages in wiki_cache"
+        else:
+            synthetic = ScaleFreeInternet(n)
+            build_link_graph({f"/wiki/P{i}": synthetic.links(f"/wiki/P{i}") for i in range(n)}, tmp)
+            races = synthetic.race_suite(300, 3, seed=1)
+            internet_factory, description = (lambda: ScaleFreeInternet(n)), f"synthetic graph of {n} pages"
+        graph = LinkGraph(tmp)
+        train, held_out = races[:-50], races[-50:]
+        paths = [path for path in (graph.shortest_path(source, goal) for source, goal in train) if path]
+        model = train_link_model(paths, graph.get_links, graph_features(graph))
+        print(f"corpus: {description}; trained on {len(paths)} races, tested on {len(held_out)}")
+        for name, candidate in (("without model", None), ("with model", model)):
+            mean, solved = downloads(internet_factory, held_out, candidate)
+            print(f"{name:15} {mean:8.1f} downloads per race, {solved} solved")
+        graph.close()
+
+
+if __name__ == "__main__":
+    main(sys.argv)
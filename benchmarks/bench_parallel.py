@@ -0,0 +1,67 @@
+"""
+Time BFS with its frontier parsed on a process pool (ParallelInternet) against
+the sequential BFS, on a recorded corpus: the pages in wiki_cache if it has
+races, otherwise a synthetic scale-free corpus padded to the size of real
+Wikipedia pages. Every parallel run is checked to give the same path and the
+same requests as the sequential one.
+
+Usage:
+    python -m benchmarks.bench_parallel [workers ...]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from functools import partial
+
+from benchmarks.suite import recorded_races
+from py_wikiracer.cache_store import DirectoryCacheStore
+from py_wikiracer.internet import FILE_CACHE_DIR
+from py_wikiracer.offline import OfflineInternet, ScaleFreeInternet
+from py_wikiracer.parallel import ParallelInternet
+from py_wikiracer.wikiracer import BFSProblem
+
+PREFETCH_PER_WORKER = 32
+
+
+def synthetic_corpus(path, n=2000):
+    synthetic = ScaleFreeInternet(n, mean_degree=40)
+    cache = DirectoryCacheStore(path)
+    rng = random.Random(0)
+    for i in range(n):
+        filler = "".join(f'<p class="c{j % 7}">Some <b>text</b> <span>{rng.random()}</span></p>\n' for j in range(800))
+        cache.put(f"/wiki/P{i}", None, synthetic.render(f"/wiki/P{i}").replace("<ul>", filler + "<ul>"))
+    return cache, synthetic.race_suite(5, 3)
+
+
+def run(internet, races, prefetch):
+    paths, start = list(), time.perf_counter()
+    for source, goal in races:
+        paths.append(BFSProblem(internet, prefetch=prefetch).bfs(source, goal))
+    return paths, time.perf_counter() - start
+
+
+def main(argv):
+    workers = [int(arg) for arg in argv[1:]] or [2, 4, 8]
+    with tempfile.TemporaryDirectory() as tmp:
+        races = recorded_races(5, 3)
+        if races:
+            cache, description = DirectoryCacheStore(FILE_CACHE_DIR), f"pages in {FILE_CACHE_DIR}"
+        else:
+            (cache, races), description = synthetic_corpus(tmp), "synthetic pages"
+        internet_factory = partial(OfflineInternet, cache)
+        print(f"corpus: {description}, {len(races)} races, {os.cpu_count()} cores")
+        sequential = internet_factory()
+        expected, baseline = run(sequential, races, 0)
+        print(f"sequential:    {baseline:8.2f}s, {len(sequential.requests)} requests")
+        for count in workers:
+            internet = ParallelInternet(internet_factory, workers=count)
+            paths, seconds = run(internet, races, PREFETCH_PER_WORKER * count)
+            internet.close()
+            same = paths == expected and internet.requests == sequential.requests
+            print(f"{count:2} workers:    {seconds:8.2f}s ({baseline / seconds:.1f}x){'' if same else '  RESULTS DIFFER'}")
+
+
+if __name__ == "__main__":
+    main(sys.argv)
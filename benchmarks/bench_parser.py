@@ -0,0 +1,59 @@
+"""
+Compare link extraction throughput of Parser.get_links_in_page against the
+original HTMLParser-based extractor.
+
+Usage:
+    python -m benchmarks.bench_parser [cache_dir]
+
+Pages are read from the Internet file cache (wiki_cache by default). If the
+cache is empty, a synthetic corpus of Wikipedia-sized pages is used instead.
+"""
+import random
+import sys
+import time
+from py_wikiracer.internet import FILE_CACHE_DIR, cached_pages
+from py_wikiracer.wikiracer import Parser, html_parser_links
+
+
+def synthetic_page(rng, n_links=1500):
+    parts = ["<html><head><script>var x = 1;</script></head><body>"]
+    for i in range(n_links):
+        title = f"Page_{rng.randrange(50000)}"
+        parts.append(f'<p class="c{i % 7}">Some <b>text</b> about <span>{title}</span> '
+                     f'<a href="/wiki/{title}" title="{title}">{title}</a> and '
+                     f'<a href="/wiki/File:{title}.png" class="image">img</a></p>\n')
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+def load_corpus(cache_dir):
+    pages = [html for _, html in cached_pages(cache_dir)]
+    if pages:
+        return pages, f"{len(pages)} cached pages from {cache_dir}"
+    rng = random.Random(0)
+    pages = [synthetic_page(rng) for _ in range(50)]
+    return pages, f"{len(pages)} synthetic pages"
+
+
+def bench(fn, pages, rounds=3):
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for html in pages:
+            fn(html)
+        best = min(best, time.perf_counter() - start)
+    return len(pages) / best
+
+
+def main(argv):
+    pages, description = load_corpus(argv[1] if len(argv) > 1 else FILE_CACHE_DIR)
+    mismatches = sum(html_parser_links(html) != Parser.get_links_in_page(html) for html in pages)
+    print(f"corpus: {description}, {sum(map(len, pages)) / 1e6:.1f} MB, {mismatches} mismatching pages")
+    legacy = bench(html_parser_links, pages)
+    current = bench(Parser.get_links_in_page, pages)
+    print(f"HTMLParser:    {legacy:10.1f} pages/sec")
+    print(f"Parser:        {current:10.1f} pages/sec ({current / legacy:.1f}x)")
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,217 @@
+"""
+Offline, deterministic benchmark suite for BFS, DFS, Dijkstra and the racer.
+
+Every suite is a fixed list of races against an offline Internet: recorded
+pages from wiki_cache (OfflineInternet) or a scale-free synthetic graph of
+10^4 to 10^7 pages (ScaleFreeInternet). Nothing touches the network, so runs
+are reproducible and work in air-gapped CI. Each (suite, algorithm) pair runs
+in a fresh process so its peak RSS can be measured.
+
+Usage:
+    python -m benchmarks.suite [--suite NAME ...] [--output results.json] [--compare baseline.json]
+
+With --compare, any metric that got worse than the baseline by more than
+--threshold (10% by default) is reported as a regression, and the exit
+status is 1. Downloads, seconds and clicks are compared per race (clicks
+per solved race), so solving more races does not count against a run.
+Results record the git commit they were measured on.
+"""
+import argparse
+import json
+import multiprocessing
+import random
+import resource
+import subprocess
+import sys
+import time
+
+from py_wikiracer.cache_store import DirectoryCacheStore
+from py_wikiracer.internet import FILE_CACHE_DIR
+from py_wikiracer.offline import OfflineInternet, ScaleFreeInternet
+from py_wikiracer.wikiracer import BFSProblem, DFSProblem, DijkstrasProblem, Parser, WikiracerProblem
+
+MAX_REQUESTS = 5000
+
+# name -> (pages, races, hops); "recorded" uses the pages in wiki_cache instead.
+SUITES = {
+    "recorded": (None, 10, 3),
+    "synthetic-1e4": (10 ** 4, 10, 3),
+    "synthetic-1e5": (10 ** 5, 10, 3),
+    "synthetic-1e6": (10 ** 6, 5, 3),
+    "synthetic-1e7": (10 ** 7, 5, 2),
+}
+DEFAULT_SUITES = ["recorded", "synthetic-1e4", "synthetic-1e5"]
+
+ALGORITHMS = {
+    "bfs": lambda internet, source, goal: BFSProblem(internet).bfs(source, goal),
+    "dfs": lambda internet, source, goal: DFSProblem(internet).dfs(source, goal),
+    "iddfs": lambda internet, source, goal: DFSProblem(internet).iddfs(source, goal),
+    "dijkstra": lambda internet, source, goal: DijkstrasProblem(internet).dijkstras(source, goal),
+    "racer": lambda internet, source, goal: WikiracerProblem(internet).wikiracer(source, goal),
+}
+
+# Lower is better for every metric compared across runs. Each total is averaged
+# over the count given here: clicks only add up over solved races, so solving one
+# more race must not read as a regression.
+COMPARED = {"seconds": "races", "downloads": "races", "peak_rss_kb": None, "clicks": "solved"}
+
+
+class RequestLimit(Exception):
+    pass
+
+
+class CappedInternet:
+    """
+    Passes requests through to an offline Internet and gives up after `limit`
+    downloads, so a search that wanders off (DFS usually does) cannot stall the suite.
+    """
+
+    def __init__(self, internet, limit=MAX_REQUESTS):
+        self.internet = internet
+        self.limit = limit
+        self.requests = internet.requests
+        self.at_time = getattr(internet, "at_time", None)
+
+    def __check(self):
+        if len(self.requests) >= self.limit:
+            raise RequestLimit()
+
+    def get_page(self, page):
+        self.__check()
+        return self.internet.get_page(page)
+
+    def get_random(self):
+        self.__check()
+        return self.internet.get_random()
+
+
+def recorded_races(count, hops, seed=0, cache_dir=FILE_CACHE_DIR):
+    cache = DirectoryCacheStore(cache_dir)
+    recorded = sorted(page for page, _ in cache.items())
+    recorded_set = set(recorded)
+    links = lambda page: [link for link in Parser.get_links_in_page(cache.get(page)) if link in recorded_set]
+    rng = random.Random(seed)
+    races = list()
+    for _ in range(count * 20):
+        if len(races) == count or not recorded:
+            break
+        source = page = rng.choice(recorded)
+        for _ in range(hops):
+            candidates = links(page)
+            if not candidates:
+                break
+            page = rng.choice(candidates)
+        if page != source:
+            races.append((source, page))
+    return races
+
+
+def make_suite(name):
+    pages, count, hops = SUITES[name]
+    if pages is None:
+        return (lambda: OfflineInternet()), recorded_races(count, hops)
+    return (lambda: ScaleFreeInternet(pages)), ScaleFreeInternet(pages).race_suite(count, hops)
+
+
+def run_algorithm(suite, algorithm, connection):
+    internet_factory, races = make_suite(suite)
+    search = ALGORITHMS[algorithm]
+    result = {"races": len(races), "solved": 0, "aborted": 0, "seconds": 0.0, "downloads": 0, "clicks": 0}
+    for source, goal in races:
+        internet = CappedInternet(internet_factory())
+        start = time.perf_counter()
+        try:
+            path = search(internet, source, goal)
+        except RequestLimit:
+            path = None
+            result["aborted"] += 1
+        result["seconds"] += time.perf_counter() - start
+        result["downloads"] += len(internet.requests)
+        if path is not None:
+            result["solved"] += 1
+            result["clicks"] += len(path) - 1
+    result["seconds"] = round(result["seconds"], 4)
+    result["peak_rss_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    connection.send(result)
+    connection.close()
+
+
+def run_suite(suite, algorithms=ALGORITHMS):
+    context = multiprocessing.get_context("spawn")
+    results = dict()
+    for algorithm in algorithms:
+        receiver, sender = context.Pipe(duplex=False)
+        process = context.Process(target=run_algorithm, args=(suite, algorithm, sender))
+        process.start()
+        results[algorithm] = receiver.recv()
+        process.join()
+    return results
+
+
+def average(result, metric, per):
+    if per is None:
+        return result[metric]
+    return result[metric] / result[per] if result[per] else 0.0
+
+
+def compare(baseline, current, threshold=0.1):
+    """
+    Returns a line for every (suite, algorithm, metric) that is worse than the baseline by more than `threshold`.
+    Totals are compared as averages per race (clicks per solved race), and fewer solved races is always a regression.
+    """
+    regressions = list()
+    for suite, algorithms in current.items():
+        for algorithm, result in algorithms.items():
+            old = baseline.get(suite, {}).get(algorithm)
+            if old is None:
+                continue
+            for metric, per in COMPARED.items():
+                before, after = average(old, metric, per), average(result, metric, per)
+                if before and after > before * (1 + threshold):
+                    label = {"races": " per race", "solved": " per solved race"}.get(per, "")
+                    regressions.append(f"{suite} {algorithm} {metric}{label}: {before:g} -> {after:g}")
+            if result["solved"] < old["solved"]:
+                regressions.append(f"{suite} {algorithm} solved: {old['solved']} -> {result['solved']}")
+    return regressions
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the offline search benchmark suite.")
+    parser.add_argument("--suite", action="append", choices=sorted(SUITES), help="suite to run (repeatable)")
+    parser.add_argument("--algorithm", action="append", choices=sorted(ALGORITHMS), help="algorithm to run (repeatable)")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="baseline results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    results = dict()
+    print(f"{'suite':15} {'algorithm':9} {'solved':>7} {'aborted':>7} {'seconds':>8} {'downloads':>9} {'clicks':>6} {'peak RSS MB':>11}")
+    for suite in args.suite or DEFAULT_SUITES:
+        results[suite] = run_suite(suite, args.algorithm or ALGORITHMS)
+        for algorithm, r in results[suite].items():
+            print(f"{suite:15} {algorithm:9} {r['solved']:>3}/{r['races']:<3} {r['aborted']:7} {r['seconds']:8.2f} "
+                  f"{r['downloads']:9} {r['clicks']:6} {r['peak_rss_kb'] / 1024:11.1f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"commit": git_commit(), "results": results}, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline["results"], results, args.threshold)
+        print(f"compared with {baseline.get('commit')}: {len(regressions)} regressions")
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
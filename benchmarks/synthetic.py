@@ -0,0 +1,33 @@
+import random
+
+
+class SyntheticInternet:
+    """
+    Stand-in for Internet that serves a random directed graph with `n` pages
+    named /wiki/Node_0 ... /wiki/Node_{n-1}, each linking to `degree` others.
+    A `hub_fraction` of all links point at the first `hubs` pages, like the
+    country and topic pages that most Wikipedia articles link to.
+    Pages are generated on demand and are the same for a given seed.
+    """
+
+    def __init__(self, n, degree=10, seed=0, hubs=0, hub_fraction=0.0):
+        self.n = n
+        self.degree = degree
+        self.seed = seed
+        self.hubs = hubs
+        self.hub_fraction = hub_fraction
+        self.requests = []
+
+    def links(self, page):
+        rng = random.Random(f"{self.seed}:{page}")
+        links = list()
+        for _ in range(self.degree):
+            if self.hubs and rng.random() < self.hub_fraction:
+                links.append(f"/wiki/Node_{rng.randrange(self.hubs)}")
+            else:
+                links.append(f"/wiki/Node_{rng.randrange(self.n)}")
+        return list(dict.fromkeys(links))
+
+    def get_page(self, page):
+        self.requests.append(page)
+        return "".join(f'<a href="{link}">{link}</a>' for link in self.links(page))
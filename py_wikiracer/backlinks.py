@@ -0,0 +1,41 @@
+from py_wikiracer.internet import FILE_CACHE_DIR, cached_pages
+from py_wikiracer.wikiracer import Parser
+from collections import defaultdict
+from typing import Iterable, List, Mapping
+
+
+class BacklinkIndex:
+    """
+    Answers "what links here" for a page without downloading anything.
+
+    get_backlinks(page) returns the pages known to link to `page`, in the order
+    they were indexed. The index is only as complete as the pages it was built
+    from, so searches treat backlinks as hints and never count them as requests.
+
+    Any object with a get_backlinks(page) method can be used in its place, for
+    example a stub that returns canned "what links here" results.
+
+    Usage of BacklinkIndex:
+    index = BacklinkIndex.from_forward_links({"/wiki/A": ["/wiki/B"]})
+    index.get_backlinks("/wiki/B")  # ["/wiki/A"]
+    index = BacklinkIndex.from_file_cache()
+    """
+
+    def __init__(self, backlinks: Mapping[str, List[str]]):
+        self.backlinks = backlinks
+
+    def get_backlinks(self, page: str) -> List[str]:
+        return self.backlinks.get(page, [])
+
+    @staticmethod
+    def from_forward_links(forward_links: Mapping[str, Iterable[str]]) -> "BacklinkIndex":
+        backlinks = defaultdict(list)
+        for page, links in forward_links.items():
+            for link in links:
+                backlinks[link].append(page)
+        return BacklinkIndex(dict(backlinks))
+
+    @staticmethod
+    def from_file_cache(cache_dir: str = FILE_CACHE_DIR, at_time=None) -> "BacklinkIndex":
+        forward_links = {page: Parser.get_links_in_page(html) for page, html in cached_pages(cache_dir, at_time)}
+        return BacklinkIndex.from_forward_links(forward_links)
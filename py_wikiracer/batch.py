@@ -0,0 +1,176 @@
+"""
+Runs many races at once and streams one JSON line per race as soon as it finishes.
+
+Races that share a goal are grouped and run one after another in the same
+process. Every race in a process shares one LinkCache, so the goal's
+neighborhood (and any hub page) is downloaded and parsed once per process.
+Groups run in parallel on a process pool. With --link-cache, every process
+also shares a persistent SQLite link cache, so pages parsed by any earlier
+race are not fetched again.
+
+Usage:
+    python -m py_wikiracer.batch races.txt [--workers 4] [--link-cache links.sqlite] [--model link_model.json]
+                                           [--at-time YYYYMMDDHHMMSS | --snapshot | --new-snapshot]
+
+races.txt holds one race per line: a source and a goal page separated by
+whitespace. Blank lines and lines starting with # are skipped; any other line
+that is not a race is reported as an error record ({"line", "text", "error"})
+and the rest of the batch still runs.
+"""
+from py_wikiracer.heuristics import LinkModel
+from py_wikiracer.internet import Internet, pinned_snapshot
+from py_wikiracer.link_cache import LinkCache
+from py_wikiracer.wikiracer import WikiracerProblem
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from queue import Empty
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
+import argparse
+import json
+import multiprocessing
+import sys
+import time
+
+Race = Tuple[str, str]
+
+POLL_SECONDS = 0.5
+
+_link_caches = dict()
+_link_models = dict()
+
+
+def shared_link_cache(path=None) -> LinkCache:
+    """
+    The LinkCache that every race in this process shares, optionally backed by a SQLite sidecar at `path`.
+    """
+    if path not in _link_caches:
+        _link_caches[path] = LinkCache(path=path)
+    return _link_caches[path]
+
+
+def shared_link_model(path=None) -> LinkModel:
+    """
+    The LinkModel saved at `path` (see py_wikiracer.link_model), read once per process; None without a path.
+    """
+    if path is None:
+        return None
+    if path not in _link_models:
+        _link_models[path] = LinkModel.load(path)
+    return _link_models[path]
+
+
+def read_races(lines: Iterable[str], errors: List[Dict] = None) -> List[Race]:
+    """
+    Returns the races in `lines`. A line that is not a source and a goal is skipped, and an
+    error record for it is appended to `errors` if given.
+    """
+    races = list()
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        pages = line.split()
+        if len(pages) != 2:
+            if errors is not None:
+                errors.append({"line": number, "text": line, "error": "expected a source and a goal separated by whitespace"})
+            continue
+        races.append((pages[0], pages[1]))
+    return races
+
+
+def group_by_goal(races: Iterable[Race]) -> List[List[Race]]:
+    groups = dict()
+    for source, goal in races:
+        groups.setdefault(goal, []).append((source, goal))
+    return list(groups.values())
+
+
+def run_race(source: str, goal: str, internet_factory: Callable = Internet, link_cache: LinkCache = None, model: LinkModel = None) -> Dict:
+    internet = internet_factory()
+    start = time.perf_counter()
+    result = {"source": source, "goal": goal}
+    if getattr(internet, "at_time", None) is not None:
+        result["at_time"] = internet.at_time
+    try:
+        result["path"] = WikiracerProblem(internet, link_cache=link_cache, model=model).wikiracer(source, goal)
+    except Exception as e:
+        result["path"] = None
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["requests"] = len(internet.requests)
+    result["seconds"] = round(time.perf_counter() - start, 3)
+    return result
+
+
+def iter_group(group: List[Race], internet_factory: Callable = Internet, link_cache_path=None, model_path=None) -> Iterator[Dict]:
+    link_cache = shared_link_cache(link_cache_path)
+    model = shared_link_model(model_path)
+    for source, goal in group:
+        yield run_race(source, goal, internet_factory, link_cache, model)
+
+
+def run_group(group: List[Race], results, internet_factory: Callable = Internet, link_cache_path=None, model_path=None) -> None:
+    # Runs in a worker process; each result goes back through the `results` queue as soon as its race ends.
+    for result in iter_group(group, internet_factory, link_cache_path, model_path):
+        results.put(result)
+
+
+def next_result(results, futures) -> Dict:
+    while True:
+        try:
+            return results.get(timeout=POLL_SECONDS)
+        except Empty:
+            # A worker that died will never send its results; raise its error instead of waiting forever.
+            for future in futures:
+                if future.done():
+                    future.result()
+
+
+def race_batch(races: Iterable[Race], workers: int = 1, internet_factory: Callable = Internet, link_cache_path=None,
+               model_path=None) -> Iterator[Dict]:
+    """
+    Yields a result dict for every race as soon as it finishes: source, goal,
+    path, requests (pages this race downloaded itself) and seconds.
+    `internet_factory` builds a fresh Internet for each race and must be picklable when workers > 1.
+    With `model_path`, every race is steered by the LinkModel saved there.
+    """
+    groups = group_by_goal(races)
+    if workers <= 1:
+        for group in groups:
+            yield from iter_group(group, internet_factory, link_cache_path, model_path)
+        return
+    run = partial(run_group, internet_factory=internet_factory, link_cache_path=link_cache_path, model_path=model_path)
+    with multiprocessing.Manager() as manager, ProcessPoolExecutor(max_workers=workers) as executor:
+        results = manager.Queue()
+        futures = [executor.submit(run, group, results) for group in groups]
+        for _ in range(sum(map(len, groups))):
+            yield next_result(results, futures)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a batch of wikiraces and print one JSON line per race.")
+    parser.add_argument("races", help="file with one 'source goal' pair per line, or - for stdin")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--link-cache", default=None, help="SQLite file shared by all workers for parsed links")
+    parser.add_argument("--at-time", default=None, help="race against Wikipedia as it was at YYYYMMDDHHMMSS")
+    parser.add_argument("--snapshot", action="store_true", help="race against the pinned snapshot, pinning the current revisions the first time")
+    parser.add_argument("--new-snapshot", action="store_true", help="pin the revisions current now and race against them")
+    parser.add_argument("--model", default=None, help="LinkModel JSON (see py_wikiracer.link_model) to order the racer's links")
+    args = parser.parse_args(argv)
+    errors = list()
+    if args.races == "-":
+        races = read_races(sys.stdin, errors)
+    else:
+        with open(args.races) as f:
+            races = read_races(f, errors)
+    for error in errors:
+        print(json.dumps(error), flush=True)
+    at_time = args.at_time
+    if at_time is None and (args.snapshot or args.new_snapshot):
+        at_time = pinned_snapshot(refresh=args.new_snapshot)
+    internet_factory = partial(Internet, at_time=at_time)
+    for result in race_batch(races, args.workers, internet_factory, args.link_cache, args.model):
+        print(json.dumps(result), flush=True)
+
+
+if __name__ == "__main__":
+    main()
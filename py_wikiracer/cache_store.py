@@ -0,0 +1,117 @@
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+import base64
+import os
+import sqlite3
+import threading
+import zlib
+
+
+class DirectoryCacheStore:
+    """
+    The original page cache layout: one file per page in a flat directory,
+    named by the urlsafe base64 encoding of "title:at_time".
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+
+    @staticmethod
+    def file_name(page: str, at_time) -> str:
+        return base64.urlsafe_b64encode(f"{page[6:]}:{at_time}".encode("utf-8")).decode("utf-8")
+
+    def get(self, page: str, at_time=None) -> Optional[str]:
+        try:
+            return (self.path / DirectoryCacheStore.file_name(page, at_time)).read_text(encoding="utf-8")
+        except FileNotFoundError:
+            return None
+
+    def put(self, page: str, at_time, html: str) -> None:
+        self.path.mkdir(parents=True, exist_ok=True)
+        local_path = self.path / DirectoryCacheStore.file_name(page, at_time)
+        # Write then rename, so concurrent readers never see a half-written page.
+        temp_path = local_path.with_name(f"{local_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        temp_path.write_text(html, encoding="utf-8")
+        temp_path.replace(local_path)
+
+    def items(self, at_time=None) -> Iterator[Tuple[str, str]]:
+        for page, page_time, html in self.entries():
+            if page_time == str(at_time):
+                yield page, html
+
+    def entries(self) -> Iterator[Tuple[str, str, str]]:
+        """
+        Yields (page, at_time, html) for every cached page, with at_time as it appears in the file name.
+        """
+        if not self.path.is_dir():
+            return
+        for path in self.path.iterdir():
+            if path.name.endswith(".tmp"):
+                continue
+            title, _, page_time = base64.urlsafe_b64decode(path.name).decode("utf-8").rpartition(":")
+            yield "/wiki/" + title, page_time, path.read_text(encoding="utf-8")
+
+
+class SQLiteCacheStore:
+    """
+    Keeps every cached page in a single SQLite file, zlib-compressed. The
+    database runs in WAL mode, so any number of readers (threads or processes)
+    can look pages up while another one writes. Each thread uses its own
+    connection.
+
+    Usage of SQLiteCacheStore:
+    store = SQLiteCacheStore("wiki_cache.sqlite")
+    store.import_directory("wiki_cache")
+    internet = Internet(cache=store)
+    """
+
+    def __init__(self, path, level: int = 6):
+        self.path = str(path)
+        self.level = level
+        self.__local = threading.local()
+        self.__connection().execute("CREATE TABLE IF NOT EXISTS pages (page TEXT, at_time TEXT, html BLOB, PRIMARY KEY (page, at_time))")
+        self.__connection().commit()
+
+    def __connection(self):
+        connection = getattr(self.__local, "connection", None)
+        if connection is None:
+            connection = self.__local.connection = sqlite3.connect(self.path, timeout=60)
+            connection.execute("PRAGMA journal_mode=WAL")
+        return connection
+
+    def get(self, page: str, at_time=None) -> Optional[str]:
+        row = self.__connection().execute("SELECT html FROM pages WHERE page = ? AND at_time = ?", (page, str(at_time))).fetchone()
+        if row is None:
+            return None
+        return zlib.decompress(row[0]).decode("utf-8")
+
+    def put(self, page: str, at_time, html: str) -> None:
+        connection = self.__connection()
+        connection.execute("INSERT OR REPLACE INTO pages VALUES (?, ?, ?)",
+                           (page, str(at_time), zlib.compress(html.encode("utf-8"), self.level)))
+        connection.commit()
+
+    def items(self, at_time=None) -> Iterator[Tuple[str, str]]:
+        rows = self.__connection().execute("SELECT page, html FROM pages WHERE at_time = ?", (str(at_time),))
+        for page, html in rows:
+            yield page, zlib.decompress(html).decode("utf-8")
+
+    def import_directory(self, cache_dir) -> int:
+        """
+        Copies every page from a one-file-per-page cache directory into this store,
+        in a single transaction. Returns the number of pages imported.
+        """
+        count = 0
+        connection = self.__connection()
+        with connection:
+            for page, page_time, html in DirectoryCacheStore(cache_dir).entries():
+                connection.execute("INSERT OR REPLACE INTO pages VALUES (?, ?, ?)",
+                                   (page, page_time, zlib.compress(html.encode("utf-8"), self.level)))
+                count += 1
+        return count
+
+    def close(self):
+        connection = getattr(self.__local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self.__local.connection = None
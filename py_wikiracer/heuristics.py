@@ -0,0 +1,125 @@
+from functools import lru_cache
+from math import exp
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, List, Tuple
+import json
+
+USEFUL_PATH = Path(__file__).parent / "wiki.txt"
+LINK_MODEL_PATH = "link_model.json"
+
+USELESS = frozenset({"A", "a", "An", "an", "the", "The", "of", "for", "in", "on", "Main", "Page", "to", "and", "from", "by", "ISBN"})
+
+
+@lru_cache(maxsize=None)
+def load_useful(path=USEFUL_PATH) -> FrozenSet[str]:
+    """
+    The hub pages listed in wiki.txt, read once per process.
+    """
+    with open(path, "r") as f:
+        return frozenset(line.strip() for line in f)
+
+
+def title_words(page: str) -> List[str]:
+    return page.replace("/wiki/", "").replace("(", "").replace(")", "").split("_")
+
+
+def title_tokens(page: str) -> List[str]:
+    return [word.lower() for word in title_words(page) if word and word not in USELESS]
+
+
+class LinkModel:
+    """
+    A link-priority model, trained by py_wikiracer.link_model.
+
+    score(page) is the model's probability that a race should follow a link to
+    `page`: a logistic function of the weights of its title words plus its
+    graph features, weighted by graph_weights. The graph features are kept for
+    the best connected pages of the link graph and are 0 for the rest:
+
+    centrality  log(PageRank x pages), how many pages lead to it
+    reach       log(links / average links), how many pages it leads to
+
+    Usage of LinkModel:
+    model = LinkModel.load("link_model.json")
+    model.score("/wiki/United_States")  # close to 1 for hubs
+    WikiracerProblem(internet, model = model).wikiracer(source, goal)
+    """
+    NO_FEATURES = (0.0, 0.0)
+
+    def __init__(self, weights: Dict[str, float] = None, graph_features: Dict[str, Tuple[float, float]] = None,
+                 bias: float = 0.0, graph_weights: Tuple[float, float] = NO_FEATURES):
+        self.weights = dict() if weights is None else weights
+        self.graph_features = dict() if graph_features is None else graph_features
+        self.bias = bias
+        self.graph_weights = tuple(graph_weights)
+
+    def score(self, page: str) -> float:
+        return self.probability(title_tokens(page), self.graph_features.get(page, LinkModel.NO_FEATURES))
+
+    def probability(self, tokens: List[str], features) -> float:
+        weights = self.weights
+        z = self.bias + sum(w * x for w, x in zip(self.graph_weights, features)) + sum(weights.get(token, 0.0) for token in tokens)
+        return 1 / (1 + exp(-max(-30.0, min(30.0, z))))
+
+    def save(self, path) -> None:
+        Path(path).write_text(json.dumps({"bias": self.bias, "graph_weights": self.graph_weights,
+                                          "weights": self.weights, "graph_features": self.graph_features}))
+
+    @staticmethod
+    def load(path) -> "LinkModel":
+        model = json.loads(Path(path).read_text())
+        graph_features = {page: tuple(features) for page, features in model["graph_features"].items()}
+        return LinkModel(model["weights"], graph_features, model["bias"], model["graph_weights"])
+
+
+class TierHeuristic:
+    """
+    The racer's Dijkstra cost function, with every signal set precomputed into one
+    hashed tier table, so scoring a link is a dict lookup:
+
+    9999999999  links that a random page also has (too generic to help)
+    0           goal neighbors known to link to the goal
+    0.1         goal neighbors, whether expanded or not yet
+    1           useful hubs, and source links found two steps from the goal
+    10          pages two steps from the goal
+    100         pages sharing a title word with both the source and goal neighborhoods
+    10000       everything else
+
+    A page in several sets gets the first matching tier in this list. With a
+    `model` (a LinkModel), pages in the last two tiers are ordered by the model's
+    score within their tier: the cost drops towards the tier below (10 or 100)
+    by up to MODEL_SPREAD of the gap, but never reaches it.
+
+    Scores are remembered per page, and since the cost only depends on the link,
+    an instance can be passed straight to DijkstrasProblem as costFn. score_all
+    scores a page's whole link list at once, for DijkstrasProblem's costsFn.
+    """
+    MODEL_SPREAD = 0.9
+
+    def __init__(self, common: Iterable[str], good: Iterable[str], near: Iterable[str],
+                 useful: Iterable[str], goal_neighborhood: Iterable[str], keywords: Iterable[str], model = None):
+        table = dict.fromkeys(goal_neighborhood, 10)
+        table.update(dict.fromkeys(useful, 1))
+        table.update(dict.fromkeys(near, 0.1))
+        table.update(dict.fromkeys(good, 0))
+        table.update(dict.fromkeys(common, 9999999999))
+        self.table = table
+        self.keywords = frozenset(keywords)
+        self.model = model
+
+    def __call__(self, node1: str, node2: str) -> float:
+        return self.score(node2)
+
+    def score(self, page: str) -> float:
+        cost = self.table.get(page)
+        if cost is None:
+            (cost, floor) = (100, 10) if self.keywords.intersection(title_words(page)) else (10000, 100)
+            if self.model is not None:
+                cost -= TierHeuristic.MODEL_SPREAD * (cost - floor) * self.model.score(page)
+            self.table[page] = cost
+        return cost
+
+    def score_all(self, pages: Iterable[str]) -> List[float]:
+        # A page's whole link list in one call; most links are already in the table.
+        get, score = self.table.get, self.score
+        return [cost if (cost := get(page)) is not None else score(page) for page in pages]
@@ -1,10 +1,63 @@
-from urllib.request import urlopen
-from urllib.error import HTTPError
-from html import unescape
-from pathlib import Path
-import base64
+from http.client import HTTPConnection, HTTPSConnection, HTTPException
+from urllib.parse import urljoin, urlsplit
+from concurrent.futures import ThreadPoolExecutor
+from py_wikiracer.cache_store import DirectoryCacheStore
+from py_wikiracer.revision_cache import REVISION_CACHE_FILE, RevisionCache
+from datetime import datetime, timezone
+import codecs
+import threading
+import gzip
+import re
+import zlib
 
 FILE_CACHE_DIR = "wiki_cache"
+BASE_URL = "https://en.wikipedia.org"
+MAX_WORKERS = 8
+MAX_REDIRECTS = 5
+CHUNK_SIZE = 2 ** 14
+OLDID_PATTERN = re.compile(r"&amp;oldid=(\d+)")
+
+def check_page(page):
+    if page[:6] != "/wiki/":
+        raise ValueError(f"Links must start with /wiki/. {page} is not valid.")
+    if any(i in page[6:] for i in Internet.DISALLOWED):
+        raise ValueError(f"Link cannot contain disallowed character. {page} is not valid.")
+
+
+def snapshot_time() -> str:
+    """
+    The current UTC time as an at_time ("YYYYMMDDHHMMSS"). An Internet with this
+    at_time sees Wikipedia as it is now for the whole race, however long it runs,
+    and the race can be replayed later against the same revisions.
+    """
+    return datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
+
+
+def pinned_snapshot(name="latest", refresh=False, revisions=None) -> str:
+    """
+    The at_time of the snapshot pinned as `name` in `revisions` (a RevisionCache,
+    by default the one in wiki_revisions.sqlite). The first call, or any call with
+    `refresh`, pins snapshot_time(); every later run races against the same
+    revision set and reuses the pages and revisions cached for it.
+    """
+    if revisions is None:
+        revisions = RevisionCache(REVISION_CACHE_FILE)
+    at_time = None if refresh else revisions.pinned(name)
+    if at_time is None:
+        at_time = snapshot_time()
+        revisions.pin(name, at_time)
+    return at_time
+
+
+def cached_pages(cache=FILE_CACHE_DIR, at_time=None):
+    """
+    Yields (page, html) for every page in the page cache that was downloaded
+    with the given `at_time`. `cache` is a cache store or a cache directory.
+    """
+    if not hasattr(cache, "items"):
+        cache = DirectoryCacheStore(cache)
+    return cache.items(at_time)
+
 
 class Internet:
     DISALLOWED = [":", "#", "/", "?"]
@@ -30,70 +83,299 @@ class Internet:
     because getting the revision history takes an extra internet request. However,
     this extra request will not be added to self.requests, though it will take time.
 
+    The revision each page resolves to is remembered in `revisions`, a
+    RevisionCache (by default kept in wiki_revisions.sqlite), so every page's
+    history is only read once per at_time. resolve_revisions(pages) looks up a
+    whole frontier layer's revisions concurrently ahead of time (the searches
+    in wikiracer.py call it for every layer they fetch).
+    Internet.snapshot() races against the pinned snapshot (see pinned_snapshot),
+    so repeated runs see the same revisions and hit the same caches;
+    Internet.snapshot(refresh=True) pins the revisions current now instead.
+
+
+
+    get_pages(pages) fetches several pages concurrently on a bounded pool of
+    `max_workers` threads and returns their HTML in the same order. Every page
+    is added to self.requests, exactly as if get_page had been called on each.
 
+    prefetch(pages) starts downloading pages in the background without adding
+    them to self.requests. A later get_page for one of them waits for the
+    download in flight (or reads it from the cache) instead of fetching again.
+
+    stream_page(page) yields a page's HTML in pieces as it is read from the
+    cache or the network, so a caller can stop before the end of the page.
+    Every streamed page is cached as usual: when the caller stops part way,
+    the rest of the page is still read (but not yielded) before the stream closes.
+
+    Connections are kept alive and reused by each worker thread.
+
+    Downloaded pages are kept in `cache`, a page cache store. The default is a
+    DirectoryCacheStore on wiki_cache; SQLiteCacheStore packs every page into a
+    single compressed file instead.
+
+    If `metrics` (a Metrics) is given, time spent on the network and reading the
+    cache, cache hits and misses and bytes downloaded are recorded in it.
 
     Usage of Internet:
     internet = Internet()
     html = internet.get_page("/wiki/Computer_science")
     print(html)
+    htmls = internet.get_pages(["/wiki/Computer_science", "/wiki/Wikipedia"])
+    internet = Internet.snapshot()
 
     """
 
-    def __init__(self, at_time=None):
+    def __init__(self, at_time=None, max_workers=MAX_WORKERS, base_url=BASE_URL, cache=None, metrics=None, revisions=None):
         self.requests = []
         self.at_time = at_time
+        self.metrics = metrics
+        self.cache = DirectoryCacheStore(FILE_CACHE_DIR) if cache is None else cache
+        if revisions is None and at_time is not None:
+            revisions = RevisionCache(REVISION_CACHE_FILE)
+        self.revisions = revisions
+        self.max_workers = max_workers
+        self.base_url = base_url
+        self.__executor = None
+        self.__lock = threading.RLock()
+        self.__inflight = dict()
+        self.__prefetched = set()
+        self.__local = threading.local()
 
     def get_page(self, page):
-        if page[:6] != "/wiki/":
-            raise ValueError(f"Links must start with /wiki/. {page} is not valid.")
-        if any(i in page[6:] for i in Internet.DISALLOWED):
-            raise ValueError(f"Link cannot contain disallowed character. {page} is not valid.")
+        check_page(page)
         self.requests.append(page)
+        with self.__lock:
+            future = self.__inflight.get(page)
+        if future is not None:
+            return future.result()
         return self.__get_page_internal(page)
 
+    def get_pages(self, pages):
+        pages = list(pages)
+        for page in pages:
+            check_page(page)
+        self.requests.extend(pages)
+        futures = {page: self.__submit(page) for page in dict.fromkeys(pages)}
+        return [futures[page].result() for page in pages]
+
+    def prefetch(self, pages):
+        for page in pages:
+            if page in self.__prefetched:
+                continue
+            check_page(page)
+            self.__prefetched.add(page)
+            self.__submit(page)
+
+    def stream_page(self, page, chunk_size=CHUNK_SIZE):
+        check_page(page)
+        self.requests.append(page)
+        with self.__lock:
+            future = self.__inflight.get(page)
+        html = future.result() if future is not None else self.__read_cache(page)
+        if html is None:
+            url = self.__get_url_at_time_internal(page)
+            if url is not None:
+                yield from self.__stream_url(page, f"{self.base_url}{url}", chunk_size)
+                return
+            html = "ERROR"
+            self.cache.put(page, self.at_time, html)
+        for start in range(0, len(html), chunk_size):
+            yield html[start:start + chunk_size]
+
+    @classmethod
+    def snapshot(cls, name="latest", refresh=False, revisions=None, **kwargs):
+        if revisions is None:
+            revisions = RevisionCache(REVISION_CACHE_FILE)
+        return cls(at_time=pinned_snapshot(name, refresh, revisions), revisions=revisions, **kwargs)
+
+    def resolve_revisions(self, pages):
+        """
+        Looks up the revisions of `pages` at self.at_time on the thread pool, skipping pages
+        that are already cached, and returns {page: oldid}. Nothing is added to self.requests.
+        """
+        if self.at_time is None:
+            return dict()
+        pages = [page for page in dict.fromkeys(pages) if self.cache.get(page, self.at_time) is None]
+        for page in pages:
+            check_page(page)
+        with self.__lock:
+            if self.__executor is None:
+                self.__executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        futures = {page: self.__executor.submit(self.__resolve_revision, page) for page in pages}
+        return {page: future.result() for page, future in futures.items()}
+
     # You may find this useful in your wikiracer implementation.
     def get_random(self):
         self.requests.append("Random")
-        return Internet.__readurl("https://en.wikipedia.org/wiki/Special:Random")
+        return self.__readurl(f"{self.base_url}/wiki/Special:Random")
 
-    def __get_page_internal(self, page):
-        # First see if we have it in the local cache, to reduce the number of spam requests to Wikipedia
-        file_cache_dir_path = Path(FILE_CACHE_DIR)
-        if not file_cache_dir_path.is_dir():
-            file_cache_dir_path.mkdir()
+    def __submit(self, page):
+        with self.__lock:
+            future = self.__inflight.get(page)
+            if future is None:
+                if self.__executor is None:
+                    self.__executor = ThreadPoolExecutor(max_workers=self.max_workers)
+                future = self.__inflight[page] = self.__executor.submit(self.__get_page_internal, page)
+                future.add_done_callback(lambda _: self.__finish(page))
+        return future
 
-        # Convert page to a filesystem safe name
-        title = page[6:]
-        fs_name_unsafe = title + ":" + str(self.at_time)
-        safe_name = base64.urlsafe_b64encode(fs_name_unsafe.encode("utf-8")).decode("utf-8")
+    def __finish(self, page):
+        with self.__lock:
+            self.__inflight.pop(page, None)
 
-        local_path = file_cache_dir_path / safe_name
+    def __read_cache(self, page):
+        if self.metrics is None:
+            return self.cache.get(page, self.at_time)
+        html = self.metrics.timed("cache_read", self.cache.get, page, self.at_time)
+        self.metrics.count("cache_hits" if html is not None else "cache_misses")
+        return html
 
-        if local_path.is_file():
-            return local_path.read_text(encoding="utf-8")
+    def __get_page_internal(self, page):
+        # First see if we have it in the local cache, to reduce the number of spam requests to Wikipedia
+        html = self.__read_cache(page)
+        if html is not None:
+            return html
 
         url = self.__get_url_at_time_internal(page)
-        html = Internet.__readurl(f"https://en.wikipedia.org{url}")
+        html = "ERROR" if url is None else self.__readurl(f"{self.base_url}{url}")
 
-        # write to file cache
-        local_path.write_text(html, encoding="utf-8")
+        self.cache.put(page, self.at_time, html)
 
         return html
 
     def __get_url_at_time_internal(self, page):
         if self.at_time is None:
             return page
+        oldid = self.__resolve_revision(page)
+        if oldid is None:
+            # The page did not exist yet at at_time.
+            return None
+        return f"/w/index.php?title={page[6:]}&oldid={oldid}"
+
+    def __resolve_revision(self, page):
+        oldid = self.revisions.get(page, self.at_time)
+        if self.metrics is not None:
+            self.metrics.count("revision_cache_hits" if oldid is not None else "revision_cache_misses")
+        if oldid is not None:
+            return oldid
         title = page[6:]
         revision_page = f"/w/index.php?title={title}&action=history&offset={self.at_time}"
-        revision_html = Internet.__readurl(f"https://en.wikipedia.org{revision_page}")
+        revision_html = self.__readurl(f"{self.base_url}{revision_page}")
         start_of_url = revision_html.find(f"/w/index.php?title={title}&amp;oldid=")
-        end_of_url = revision_html.find('"', start_of_url)
-        return unescape(revision_html[start_of_url : end_of_url])
-    def __readurl(url):
-        html = "ERROR"
+        match = OLDID_PATTERN.match(revision_html, start_of_url + len(f"/w/index.php?title={title}")) if start_of_url != -1 else None
+        if match is None:
+            return None
+        self.revisions.put(page, self.at_time, match.group(1))
+        return match.group(1)
+
+    def __readurl(self, url):
+        for _ in range(MAX_REDIRECTS):
+            if self.metrics is None:
+                response, body = self.__request(url)
+            else:
+                response, body = self.metrics.timed("network", self.__request, url)
+                self.metrics.count("bytes_read", len(body))
+                self.metrics.event("download", url=url, status=response.status, bytes=len(body))
+            location = response.getheader("Location")
+            if 300 <= response.status < 400 and location:
+                url = urljoin(url, location)
+                continue
+            if response.status >= 400:
+                return "ERROR"
+            if response.getheader("Content-Encoding") == "gzip":
+                body = gzip.decompress(body)
+            return body.decode("utf-8")
+        return "ERROR"
+
+    def __stream_url(self, page, url, chunk_size):
+        response = None
+        for _ in range(MAX_REDIRECTS):
+            if self.metrics is None:
+                response, _ = self.__request(url, stream=True)
+            else:
+                response, _ = self.metrics.timed("network", self.__request, url, True)
+            location = response.getheader("Location")
+            if 300 <= response.status < 400 and location:
+                self.__read(response)
+                url = urljoin(url, location)
+                response = None
+                continue
+            break
+        if response is None or response.status >= 400:
+            if response is not None:
+                self.__read(response)
+            self.cache.put(page, self.at_time, "ERROR")
+            yield "ERROR"
+            return
+        # The connection is ours until the body has been read.
+        key = urlsplit(url)[:2]
+        connection = self.__local.connections.pop(key)
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS) if response.getheader("Content-Encoding") == "gzip" else None
+        decoder = codecs.getincrementaldecoder("utf-8")()
+
+        def decode(raw):
+            data = raw
+            if decompressor is not None:
+                data = decompressor.decompress(raw) if raw else decompressor.flush()
+            return decoder.decode(data, final=not raw)
+
+        parts = list()
         try:
-            with urlopen(url) as response:
-                html = response.read().decode("utf-8")
-        except HTTPError:
-            pass
-        return html
+            try:
+                while True:
+                    raw = self.__read(response, chunk_size)
+                    text = decode(raw)
+                    if text:
+                        parts.append(text)
+                        yield text
+                    if not raw:
+                        break
+            except GeneratorExit:
+                # The caller stopped early (at the goal link, say). Finish the download
+                # anyway, so the page is cached and the connection can be reused.
+                rest = self.__read(response)
+                parts.append(decode(rest))
+                if rest:
+                    parts.append(decode(b""))
+        except BaseException:
+            connection.close()
+            raise
+        if key not in self.__local.connections:
+            self.__local.connections[key] = connection
+        else:
+            connection.close()
+        self.cache.put(page, self.at_time, "".join(parts))
+
+    def __read(self, response, amount=None):
+        if self.metrics is None:
+            return response.read(amount)
+        data = self.metrics.timed("network", response.read, amount)
+        self.metrics.count("bytes_read", len(data))
+        return data
+
+    def __request(self, url, stream=False):
+        parts = urlsplit(url)
+        target = parts.path + (f"?{parts.query}" if parts.query else "")
+        headers = {"Accept-Encoding": "gzip", "User-Agent": "py_wikiracer"}
+        # A kept-alive connection may have been closed by the server since its last use, so retry once on a new one.
+        for attempt in range(2):
+            connection = self.__connection(parts.scheme, parts.netloc)
+            try:
+                connection.request("GET", target, headers=headers)
+                response = connection.getresponse()
+                return response, None if stream else response.read()
+            except (HTTPException, OSError):
+                connection.close()
+                del self.__local.connections[(parts.scheme, parts.netloc)]
+                if attempt:
+                    raise
+
+    def __connection(self, scheme, netloc):
+        connections = getattr(self.__local, "connections", None)
+        if connections is None:
+            connections = self.__local.connections = dict()
+        connection = connections.get((scheme, netloc))
+        if connection is None:
+            connection_class = HTTPSConnection if scheme == "https" else HTTPConnection
+            connection = connections[(scheme, netloc)] = connection_class(netloc, timeout=60)
+        return connection
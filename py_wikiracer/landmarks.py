@@ -0,0 +1,128 @@
+from py_wikiracer.link_graph import LinkGraph
+from array import array
+from collections import deque
+from pathlib import Path
+from typing import Callable, List
+import json
+import mmap
+
+LANDMARK_COUNT = 32
+
+# Distances are stored as uint16; this marks pages a landmark cannot reach (or be reached from).
+UNREACHABLE = 0xFFFF
+
+
+def select_landmarks(graph: LinkGraph, count: int = LANDMARK_COUNT) -> List[int]:
+    """
+    Picks the `count` pages with the most backlinks, the hubs that most races pass through.
+    """
+    in_degree = [graph.back_offsets[i + 1] - graph.back_offsets[i] for i in range(len(graph))]
+    return sorted(range(len(graph)), key=lambda i: (-in_degree[i], i))[:count]
+
+
+def bfs_distances(graph: LinkGraph, start: int, backward: bool = False) -> array:
+    neighbors = graph.backlink_ids if backward else graph.link_ids
+    distances = array("H", [UNREACHABLE]) * len(graph)
+    distances[start] = 0
+    queue = deque([start])
+    while queue:
+        vertex = queue.popleft()
+        distance = distances[vertex] + 1
+        for next in neighbors(vertex):
+            if distances[next] == UNREACHABLE:
+                distances[next] = distance
+                queue.append(next)
+    return distances
+
+
+def build_landmarks(graph: LinkGraph, path, count: int = LANDMARK_COUNT) -> None:
+    """
+    Writes BFS distances from and to each landmark into the directory `path`:
+    landmarks.json (landmark titles), from.bin and to.bin (uint16 arrays of
+    count x len(graph) distances, one row per landmark).
+    """
+    landmarks = select_landmarks(graph, count)
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    for name, backward in (("from", False), ("to", True)):
+        with open(path / f"{name}.bin", "wb") as f:
+            for landmark in landmarks:
+                bfs_distances(graph, landmark, backward).tofile(f)
+    (path / "landmarks.json").write_text(json.dumps({"pages": len(graph), "landmarks": [graph.title(i) for i in landmarks]}))
+
+
+class Landmarks:
+    """
+    Landmark distances written by build_landmarks, mmapped next to their LinkGraph.
+
+    For a landmark L, the triangle inequality gives two lower bounds on the number
+    of clicks d(v, goal):  d(L, goal) - d(L, v)  and  d(v, L) - d(goal, L).
+    lower_bound takes the best of these over every landmark (the ALT heuristic),
+    which never overestimates, so A* with it still finds shortest paths.
+
+    Usage of Landmarks:
+    build_landmarks(graph, "landmarks")
+    landmarks = Landmarks(graph, "landmarks")
+    dij = DijkstrasProblem(LinkGraphInternet(graph))
+    dij.dijkstras(source, goal, costFn = lambda x, y: 1, heuristicFn = landmarks.heuristic(goal))
+    """
+
+    def __init__(self, graph: LinkGraph, path):
+        path = Path(path)
+        meta = json.loads((path / "landmarks.json").read_text())
+        if meta["pages"] != len(graph):
+            raise ValueError(f"{path} was built for a different link graph.")
+        self.graph = graph
+        self.titles = meta["landmarks"]
+        self._files = list()
+        self.from_landmark = self._rows(path / "from.bin")
+        self.to_landmark = self._rows(path / "to.bin")
+
+    def _rows(self, path):
+        n = len(self.graph)
+        if n == 0 or not self.titles:
+            return []
+        f = open(path, "rb")
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._files += [f, mapped]
+        distances = memoryview(mapped).cast("H")
+        return [distances[i * n:(i + 1) * n] for i in range(len(self.titles))]
+
+    def close(self):
+        self.from_landmark = self.to_landmark = None
+        for f in reversed(self._files):
+            f.close()
+        self._files = list()
+
+    def lower_bound(self, vertex: int, goal: int) -> float:
+        """
+        A lower bound on the clicks from page id `vertex` to page id `goal`; infinite if it provably cannot reach it.
+        """
+        bound = 0
+        for from_l, to_l in zip(self.from_landmark, self.to_landmark):
+            l_goal, l_vertex = from_l[goal], from_l[vertex]
+            if l_vertex != UNREACHABLE:
+                if l_goal == UNREACHABLE:
+                    return float("inf")
+                bound = max(bound, l_goal - l_vertex)
+            vertex_l, goal_l = to_l[vertex], to_l[goal]
+            if goal_l != UNREACHABLE:
+                if vertex_l == UNREACHABLE:
+                    return float("inf")
+                bound = max(bound, vertex_l - goal_l)
+        return bound
+
+    def heuristic(self, goal: str) -> Callable[[str], float]:
+        """
+        An A* heuristic for unit-cost searches towards `goal`, taking page titles. Any page other
+        than the goal is at least one click away, so bounds below 1 are raised to 1.
+        """
+        goal_id = self.graph.id(goal)
+        def h(page):
+            if page == goal:
+                return 0
+            vertex = self.graph.id(page)
+            if vertex is None or goal_id is None:
+                return 1
+            return max(1, self.lower_bound(vertex, goal_id))
+        return h
@@ -0,0 +1,110 @@
+from collections import OrderedDict
+from typing import List, Optional, Sequence
+import sqlite3
+import threading
+
+MAX_ENTRIES = 100000
+MAX_BYTES = 256 * 2 ** 20
+
+# Rough CPython cost of one short str plus its slot in a tuple.
+LINK_OVERHEAD_BYTES = 57
+
+
+class LinkCache:
+    """
+    Memoizes the links extracted from each page, keyed by (page, at_time).
+
+    Entries live in an in-memory LRU bounded by `max_entries` and by an estimate
+    of their size in bytes (`max_bytes`); the least recently used pages are
+    evicted first. If `path` is given, links are also written to a SQLite
+    sidecar file there, so pages parsed by an earlier (or concurrent) process are
+    not parsed again.
+
+    hits, sidecar_hits, misses and evictions count what the cache saved;
+    stats() returns them as a dict. contains(page, at_time) checks for an entry
+    without counting or reordering anything.
+
+    Usage of LinkCache:
+    cache = LinkCache(path="wiki_links.sqlite")
+    cache.put("/wiki/A", None, ["/wiki/B"])
+    cache.get("/wiki/A", None)  # ["/wiki/B"]
+    """
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, max_bytes: int = MAX_BYTES, path=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.sidecar_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.__lock = threading.Lock()
+        self.__sidecar = None
+        if path is not None:
+            self.__sidecar = sqlite3.connect(str(path), check_same_thread=False, timeout=60)
+            self.__sidecar.execute("PRAGMA journal_mode=WAL")
+            self.__sidecar.execute("CREATE TABLE IF NOT EXISTS links (page TEXT, at_time TEXT, links TEXT, PRIMARY KEY (page, at_time))")
+            self.__sidecar.commit()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, page: str, at_time=None) -> Optional[List[str]]:
+        key = (page, str(at_time))
+        with self.__lock:
+            links = self.entries.get(key)
+            if links is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return list(links)
+            if self.__sidecar is not None:
+                row = self.__sidecar.execute("SELECT links FROM links WHERE page = ? AND at_time = ?", key).fetchone()
+                if row is not None:
+                    self.sidecar_hits += 1
+                    links = row[0].split("\n") if row[0] else []
+                    self.__remember(key, tuple(links))
+                    return links
+            self.misses += 1
+            return None
+
+    def contains(self, page: str, at_time=None) -> bool:
+        key = (page, str(at_time))
+        with self.__lock:
+            if key in self.entries:
+                return True
+            if self.__sidecar is None:
+                return False
+            return self.__sidecar.execute("SELECT 1 FROM links WHERE page = ? AND at_time = ?", key).fetchone() is not None
+
+    def put(self, page: str, at_time, links: Sequence[str]) -> None:
+        key = (page, str(at_time))
+        with self.__lock:
+            self.__remember(key, tuple(links))
+            if self.__sidecar is not None:
+                self.__sidecar.execute("INSERT OR REPLACE INTO links VALUES (?, ?, ?)", key + ("\n".join(links),))
+                self.__sidecar.commit()
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "sidecar_hits": self.sidecar_hits, "misses": self.misses,
+                "evictions": self.evictions, "entries": len(self.entries), "bytes": self.bytes}
+
+    def close(self):
+        if self.__sidecar is not None:
+            self.__sidecar.close()
+            self.__sidecar = None
+
+    def __remember(self, key, links):
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.bytes -= LinkCache.size_of(old)
+        self.entries[key] = links
+        self.bytes += LinkCache.size_of(links)
+        while self.entries and (len(self.entries) > self.max_entries or self.bytes > self.max_bytes):
+            (_, evicted) = self.entries.popitem(last=False)
+            self.bytes -= LinkCache.size_of(evicted)
+            self.evictions += 1
+
+    @staticmethod
+    def size_of(links) -> int:
+        return sum(map(len, links)) + LINK_OVERHEAD_BYTES * len(links)
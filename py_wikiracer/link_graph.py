@@ -0,0 +1,192 @@
+from py_wikiracer.internet import FILE_CACHE_DIR, cached_pages
+from py_wikiracer.wikiracer import Parser
+from array import array
+from bisect import bisect_left
+from collections import deque
+from pathlib import Path
+from typing import Iterable, List, Mapping, Optional
+import json
+import mmap
+import sys
+
+FORMAT_VERSION = 1
+
+
+def build_link_graph(forward_links: Mapping[str, Iterable[str]], path) -> None:
+    """
+    Writes `forward_links` (page -> ordered links) to the directory `path` as a
+    compressed sparse row index:
+
+    titles.bin, title_offsets.bin   every page title, sorted, as one UTF-8 blob
+    offsets.bin, edges.bin          forward links as uint64 offsets / uint32 ids
+    back_offsets.bin, back_edges.bin   the same for backlinks
+
+    Link targets that have no entry of their own get an id with no links.
+    """
+    forward_links = {page: list(links) for page, links in forward_links.items()}
+    titles = set(forward_links)
+    for links in forward_links.values():
+        titles.update(links)
+    titles = sorted(titles)
+    ids = {title: i for i, title in enumerate(titles)}
+
+    title_blob = bytearray()
+    title_offsets = array("Q", [0])
+    for title in titles:
+        title_blob += title.encode("utf-8")
+        title_offsets.append(len(title_blob))
+
+    offsets, edges = array("Q", [0]), array("I")
+    backlinks = [list() for _ in titles]
+    for i, title in enumerate(titles):
+        for link in forward_links.get(title, ()):
+            edges.append(ids[link])
+            backlinks[ids[link]].append(i)
+        offsets.append(len(edges))
+    back_offsets, back_edges = array("Q", [0]), array("I")
+    for sources in backlinks:
+        back_edges.extend(sources)
+        back_offsets.append(len(back_edges))
+
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    (path / "titles.bin").write_bytes(title_blob)
+    for name, values in (("title_offsets", title_offsets), ("offsets", offsets), ("edges", edges),
+                         ("back_offsets", back_offsets), ("back_edges", back_edges)):
+        with open(path / f"{name}.bin", "wb") as f:
+            values.tofile(f)
+    meta = {"version": FORMAT_VERSION, "byteorder": sys.byteorder, "nodes": len(titles), "edges": len(edges)}
+    (path / "meta.json").write_text(json.dumps(meta))
+
+
+def build_from_file_cache(path, cache_dir=FILE_CACHE_DIR, at_time=None) -> None:
+    build_link_graph({page: Parser.get_links_in_page(html) for page, html in cached_pages(cache_dir, at_time)}, path)
+
+
+class _Titles:
+    # Sequence view over the mmapped title blob, so bisect can look titles up in place.
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+
+class LinkGraph:
+    """
+    A link graph written by build_link_graph, opened with mmap. Nothing is
+    parsed or loaded up front; neighbors are slices of the mmapped edge arrays.
+
+    get_links(page) and get_backlinks(page) return titles, so a LinkGraph can be
+    used as a BacklinkIndex. shortest_path(source, goal) runs BFS on integer ids
+    only, without building any strings until the path is found.
+
+    Usage of LinkGraph:
+    build_from_file_cache("link_graph")
+    graph = LinkGraph("link_graph")
+    graph.get_links("/wiki/Computer_science")
+    graph.shortest_path("/wiki/Computer_science", "/wiki/Richard_Soley")
+    """
+
+    def __init__(self, path):
+        path = Path(path)
+        meta = json.loads((path / "meta.json").read_text())
+        if meta["version"] != FORMAT_VERSION or meta["byteorder"] != sys.byteorder:
+            raise ValueError(f"{path} is not a link graph this version can read.")
+        self._files = list()
+        self.titles = _Titles(self._map(path / "titles.bin"), self._map(path / "title_offsets.bin").cast("Q"))
+        self.offsets = self._map(path / "offsets.bin").cast("Q")
+        self.edges = self._map(path / "edges.bin").cast("I")
+        self.back_offsets = self._map(path / "back_offsets.bin").cast("Q")
+        self.back_edges = self._map(path / "back_edges.bin").cast("I")
+
+    def _map(self, path):
+        f = open(path, "rb")
+        self._files.append(f)
+        if path.stat().st_size == 0:
+            return memoryview(b"")
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._files.append(mapped)
+        return memoryview(mapped)
+
+    def close(self):
+        for name in ("titles", "offsets", "edges", "back_offsets", "back_edges"):
+            setattr(self, name, None)
+        for f in reversed(self._files):
+            f.close()
+        self._files = list()
+
+    def __len__(self):
+        return len(self.titles)
+
+    def id(self, title: str) -> Optional[int]:
+        i = bisect_left(self.titles, title)
+        if i < len(self.titles) and self.titles[i] == title:
+            return i
+        return None
+
+    def title(self, i: int) -> str:
+        return self.titles[i]
+
+    def link_ids(self, i: int) -> memoryview:
+        return self.edges[self.offsets[i]:self.offsets[i + 1]]
+
+    def backlink_ids(self, i: int) -> memoryview:
+        return self.back_edges[self.back_offsets[i]:self.back_offsets[i + 1]]
+
+    def get_links(self, page: str) -> List[str]:
+        i = self.id(page)
+        return [] if i is None else [self.titles[j] for j in self.link_ids(i)]
+
+    def get_backlinks(self, page: str) -> List[str]:
+        i = self.id(page)
+        return [] if i is None else [self.titles[j] for j in self.backlink_ids(i)]
+
+    def shortest_path(self, source: str, goal: str) -> Optional[List[str]]:
+        source_id, goal_id = self.id(source), self.id(goal)
+        if source_id is None or goal_id is None:
+            return None
+        if source_id == goal_id:
+            return [source, source]
+        parents = array("l", [-1]) * len(self)
+        seen = bytearray(len(self))
+        seen[source_id] = 1
+        queue = deque([source_id])
+        while queue:
+            vertex = queue.popleft()
+            for next in self.link_ids(vertex):
+                if seen[next]:
+                    continue
+                seen[next] = 1
+                parents[next] = vertex
+                if next == goal_id:
+                    path = [next]
+                    while path[-1] != source_id:
+                        path.append(parents[path[-1]])
+                    return [self.titles[i] for i in reversed(path)]
+                queue.append(next)
+        return None
+
+
+class LinkGraphInternet:
+    """
+    Lets the search problems run against a LinkGraph instead of Wikipedia.
+    get_links(page) returns the page's links straight from the index and is
+    recorded in self.requests like a download; searches use it in place of
+    get_page + Parser.get_links_in_page.
+    """
+
+    def __init__(self, graph: LinkGraph):
+        self.graph = graph
+        self.requests = []
+
+    def get_links(self, page):
+        self.requests.append(page)
+        return self.graph.get_links(page)
+
+    def get_page(self, page):
+        return "".join(f'<a href="{link}"></a>' for link in self.get_links(page))
@@ -0,0 +1,130 @@
+"""
+Learns which links lead towards goals, from finished races and the cached
+link graph, for the racer to try first.
+
+A LinkModel is a logistic model over a page's title words plus two graph
+features: its centrality (PageRank over the link graph) and its reach (how
+many links it has). It is trained on the steps of past
+race paths: at each page, the link the path took is a positive example and
+the page's other links are negatives.
+
+Usage:
+    python -m py_wikiracer.batch races.txt > results.jsonl
+    python -m py_wikiracer.link_model link_graph results.jsonl [--shortest] [--output link_model.json]
+
+With --shortest, each race's path is replaced by a shortest path in the link
+graph. The racer only uses a model it is given:
+
+    python -m py_wikiracer.batch races.txt --model link_model.json
+    WikiracerProblem(internet, model = LinkModel.load("link_model.json"))
+"""
+from py_wikiracer.heuristics import LINK_MODEL_PATH, LinkModel, title_tokens
+from py_wikiracer.link_graph import LinkGraph
+from math import log
+from typing import Callable, Dict, Iterable, List, Tuple
+import argparse
+import json
+import random
+
+MAX_PAGES = 100000
+NEGATIVES = 20
+
+
+def pagerank(graph: LinkGraph, damping: float = 0.85, iterations: int = 20) -> List[float]:
+    """
+    PageRank of every page id in `graph`, pulled along backlinks. Pages without links
+    spread their rank evenly over every page.
+    """
+    n = len(graph)
+    if n == 0:
+        return []
+    out_degree = [graph.offsets[i + 1] - graph.offsets[i] for i in range(n)]
+    rank = [1 / n] * n
+    for _ in range(iterations):
+        share = [r / d if d else 0.0 for r, d in zip(rank, out_degree)]
+        dangling = sum(r for r, d in zip(rank, out_degree) if not d)
+        base = (1 - damping + damping * dangling) / n
+        rank = [base + damping * sum(map(share.__getitem__, graph.backlink_ids(i))) for i in range(n)]
+    return rank
+
+
+def graph_features(graph: LinkGraph, max_pages: int = MAX_PAGES) -> Dict[str, Tuple[float, float]]:
+    """
+    (centrality, reach) for the `max_pages` pages of `graph` where they are largest; see LinkModel.
+    """
+    n = len(graph)
+    rank = pagerank(graph)
+    out_degree = [graph.offsets[i + 1] - graph.offsets[i] for i in range(n)]
+    mean_degree = sum(out_degree) / n if n else 0
+    features = dict()
+    for i in range(n):
+        central = log(rank[i] * n) if rank[i] * n > 1 else 0.0
+        reach = log(out_degree[i] / mean_degree) if out_degree[i] > mean_degree else 0.0
+        if central or reach:
+            features[i] = (central, reach)
+    top = sorted(features, key=lambda i: -sum(features[i]))[:max_pages]
+    return {graph.title(i): features[i] for i in top}
+
+
+def train_link_model(paths: Iterable[List[str]], get_links: Callable[[str], List[str]], features: Dict[str, Tuple[float, float]] = None,
+                     epochs: int = 10, rate: float = 0.05, l2: float = 1e-4, seed: int = 0) -> LinkModel:
+    """
+    Fits a LinkModel by stochastic gradient descent on the steps of `paths`. The last
+    step of each path (the goal link, which every search takes on sight) is skipped.
+    """
+    rng = random.Random(seed)
+    features = dict() if features is None else features
+    examples = list()
+    for path in paths:
+        for page, taken in zip(path[:-2], path[1:-1]):
+            others = [link for link in get_links(page) if link != taken and link != path[-1]]
+            examples.append((taken, 1))
+            examples.extend((link, 0) for link in rng.sample(others, min(NEGATIVES, len(others))))
+    model = LinkModel(graph_features=features)
+    # Positives are rare among a page's links; weight them so both classes count equally.
+    positives = sum(label for _, label in examples)
+    positive_weight = (len(examples) - positives) / positives if positives else 1.0
+    examples = [(title_tokens(page), features.get(page, LinkModel.NO_FEATURES), label) for page, label in examples]
+    for _ in range(epochs):
+        rng.shuffle(examples)
+        for tokens, x, label in examples:
+            error = (label - model.probability(tokens, x)) * (positive_weight if label else 1.0)
+            model.bias += rate * error
+            model.graph_weights = tuple(w + rate * (error * xi - l2 * w) for w, xi in zip(model.graph_weights, x))
+            for token in tokens:
+                weight = model.weights.get(token, 0.0)
+                model.weights[token] = weight + rate * (error - l2 * weight)
+    return model
+
+
+def read_paths(lines: Iterable[str]) -> List[List[str]]:
+    # Race results as printed by py_wikiracer.batch, one JSON object per line.
+    paths = list()
+    for line in lines:
+        if line.strip():
+            result = json.loads(line)
+            if result.get("path"):
+                paths.append(result["path"])
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train a link-priority model from finished races.")
+    parser.add_argument("graph", help="link graph directory written by build_link_graph")
+    parser.add_argument("races", help="race results, one JSON line per race (py_wikiracer.batch output)")
+    parser.add_argument("--shortest", action="store_true", help="train on shortest paths in the graph instead")
+    parser.add_argument("--output", default=LINK_MODEL_PATH)
+    args = parser.parse_args(argv)
+    graph = LinkGraph(args.graph)
+    with open(args.races) as f:
+        paths = read_paths(f)
+    if args.shortest:
+        paths = [graph.shortest_path(path[0], path[-1]) or path for path in paths]
+    model = train_link_model(paths, graph.get_links, graph_features(graph))
+    model.save(args.output)
+    print(f"trained on {len(paths)} races: {len(model.weights)} words, {len(model.graph_features)} pages with graph features")
+    graph.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+from collections import defaultdict
+from time import perf_counter
+import json
+import threading
+
+
+class Metrics:
+    """
+    Collects where a search spends its time. Internet, CachedInternet and the
+    problem classes take an optional `metrics`; when it is None (the default)
+    every hook is skipped by a single `is None` check.
+
+    timers    seconds per phase: network, cache_read, fetch, parse, stream, heap, heuristic
+    counters  nodes_expanded, cache_hits, cache_misses, link_cache_hits,
+              link_cache_misses, bytes_read, bytes_parsed, ...
+    peaks     largest value seen, e.g. frontier size
+    events    with trace=True, a list of {"t", "kind", ...} dicts in order
+
+    summary() returns all of it as a JSON-serializable dict. Use one Metrics per
+    search to get a per-search summary. Metrics is safe to share with the
+    Internet's download threads.
+
+    Usage of Metrics:
+    metrics = Metrics(trace=True)
+    bfs = BFSProblem(Internet(metrics=metrics), metrics=metrics)
+    bfs.bfs(source, goal)
+    print(metrics.to_json())
+    """
+
+    def __init__(self, trace: bool = False):
+        self.timers = defaultdict(float)
+        self.counters = defaultdict(int)
+        self.peaks = dict()
+        self.events = list() if trace else None
+        self.start = perf_counter()
+        self.__lock = threading.Lock()
+
+    def count(self, name: str, n: int = 1) -> None:
+        with self.__lock:
+            self.counters[name] += n
+
+    def time(self, name: str, seconds: float) -> None:
+        with self.__lock:
+            self.timers[name] += seconds
+
+    def peak(self, name: str, value) -> None:
+        with self.__lock:
+            if value > self.peaks.get(name, value - 1):
+                self.peaks[name] = value
+
+    def event(self, kind: str, **fields) -> None:
+        if self.events is not None:
+            fields["t"] = round(perf_counter() - self.start, 6)
+            fields["kind"] = kind
+            with self.__lock:
+                self.events.append(fields)
+
+    def timed(self, name: str, fn, *args):
+        start = perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self.time(name, perf_counter() - start)
+
+    def timed_iter(self, name: str, iterator):
+        # Times each step of a lazy iterator, such as links streamed from a page.
+        while True:
+            start = perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.time(name, perf_counter() - start)
+            yield item
+
+    def expand(self, page: str, frontier: int) -> None:
+        self.count("nodes_expanded")
+        self.peak("frontier", frontier)
+        self.event("expand", page=page, frontier=frontier)
+
+    def summary(self) -> dict:
+        with self.__lock:
+            summary = {"seconds": round(perf_counter() - self.start, 6),
+                       "timers": {name: round(seconds, 6) for name, seconds in self.timers.items()},
+                       "counters": dict(self.counters),
+                       "peaks": dict(self.peaks)}
+            if self.events is not None:
+                summary["events"] = list(self.events)
+        return summary
+
+    def to_json(self) -> str:
+        return json.dumps(self.summary())
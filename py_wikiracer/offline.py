@@ -0,0 +1,94 @@
+from py_wikiracer.internet import FILE_CACHE_DIR, check_page
+from py_wikiracer.cache_store import DirectoryCacheStore
+from typing import List, Tuple
+import random
+
+
+class OfflineInternet:
+    """
+    Serves recorded pages from a page cache store and never goes online, so
+    searches are reproducible and can run without network access. Pages that
+    were never recorded come back as "ERROR", like a failed download.
+
+    get_random() returns one of the recorded pages, chosen by a seeded RNG.
+
+    Usage of OfflineInternet:
+    internet = OfflineInternet()                      # the pages in wiki_cache
+    internet = OfflineInternet(SQLiteCacheStore("wiki_cache.sqlite"), seed=1)
+    BFSProblem(internet).bfs(source, goal)
+    """
+
+    def __init__(self, cache=None, at_time=None, seed: int = 0):
+        self.cache = DirectoryCacheStore(FILE_CACHE_DIR) if cache is None else cache
+        self.at_time = at_time
+        self.requests = []
+        self.random = random.Random(seed)
+        self.__pages = None
+
+    def get_page(self, page):
+        check_page(page)
+        self.requests.append(page)
+        html = self.cache.get(page, self.at_time)
+        return "ERROR" if html is None else html
+
+    def get_random(self):
+        self.requests.append("Random")
+        if self.__pages is None:
+            self.__pages = sorted(page for page, _ in self.cache.items(self.at_time))
+        if not self.__pages:
+            return "ERROR"
+        return self.cache.get(self.random.choice(self.__pages), self.at_time)
+
+
+class ScaleFreeInternet:
+    """
+    A synthetic, scale-free Wikipedia of `n` pages (/wiki/P0 ... /wiki/P{n-1})
+    that costs no memory up front: each page is generated from its own seed
+    when requested. Out-degrees and link targets follow power laws, so a few low
+    numbered pages are hubs that most pages link to, as on Wikipedia.
+
+    links(page) gives a page's links without recording a request;
+    get_page(page) records it and returns the page as HTML.
+    """
+
+    def __init__(self, n: int, mean_degree: int = 20, exponent: float = 2.5, seed: int = 0):
+        self.n = n
+        self.mean_degree = mean_degree
+        self.exponent = exponent
+        self.seed = seed
+        self.requests = []
+        self.random = random.Random(seed)
+
+    def links(self, page: str) -> List[str]:
+        rng = random.Random(f"{self.seed}:{page}")
+        degree = max(1, min(self.n - 1, int(self.mean_degree * (self.exponent - 2) / (self.exponent - 1) * rng.paretovariate(self.exponent - 1))))
+        # Targets skewed towards low ids: P(id < k) grows like sqrt(k / n).
+        targets = (int(self.n * rng.random() ** 2) for _ in range(degree))
+        return list(dict.fromkeys(f"/wiki/P{target}" for target in targets))
+
+    def get_page(self, page):
+        self.requests.append(page)
+        return self.render(page)
+
+    def get_random(self):
+        self.requests.append("Random")
+        return self.render(f"/wiki/P{self.random.randrange(self.n)}")
+
+    def render(self, page: str) -> str:
+        links = "".join(f'<li><a href="{link}" title="{link[6:]}">{link[6:]}</a></li>' for link in self.links(page))
+        return f"<html><body><h1>{page[6:]}</h1><ul>{links}</ul></body></html>"
+
+    def race_suite(self, count: int, hops: int, seed: int = 0) -> List[Tuple[str, str]]:
+        """
+        `count` (source, goal) races where the goal is reached from the source by a random
+        walk of `hops` links, so every race is solvable in at most `hops` clicks.
+        """
+        rng = random.Random(seed)
+        races = list()
+        while len(races) < count:
+            source = page = f"/wiki/P{rng.randrange(self.n)}"
+            for _ in range(hops):
+                page = rng.choice(self.links(page))
+            if page != source:
+                races.append((source, page))
+        return races
@@ -0,0 +1,139 @@
+from py_wikiracer.internet import Internet, check_page
+from py_wikiracer.wikiracer import Parser
+from concurrent.futures import ProcessPoolExecutor
+from array import array
+from typing import Callable, List
+import os
+import threading
+
+MAX_BATCH = 16
+
+# Per worker process: the Internet it reads pages from, and the ids it has given to link titles.
+_internet = None
+_ids = None
+_titles = None
+
+
+def _init_worker(internet_factory):
+    global _internet, _ids, _titles
+    _internet = internet_factory()
+    _ids = dict()
+    _titles = list()
+
+
+def _expand(pages):
+    """
+    Downloads (or reads from the cache) and parses `pages` in a worker. Returns the worker's pid,
+    the titles it has not sent before with the id of the first one, and each page's links as an
+    array of those ids, which pickles far smaller than lists of strings.
+
+    A page that fails gets its exception in place of the array, and the batch goes on: the
+    titles of the other pages must still reach the coordinator, since later batches refer to them.
+    """
+    start = len(_titles)
+    arrays = list()
+    for page in pages:
+        ids = array("l")
+        try:
+            for link in Parser.get_links_in_page(_internet.get_page(page)):
+                id = _ids.get(link)
+                if id is None:
+                    id = _ids[link] = len(_titles)
+                    _titles.append(link)
+                ids.append(id)
+        except Exception as error:
+            ids = error
+        arrays.append(ids)
+    return os.getpid(), start, _titles[start:], arrays
+
+
+class ParallelInternet:
+    """
+    Parses pages on a pool of `workers` processes, so that expanding a search
+    frontier uses every core instead of one. Each worker builds its own
+    Internet with `internet_factory` (it must be picklable, like Internet or
+    functools.partial(Internet, at_time=...)) and reads pages through it,
+    which also fills the shared page cache.
+
+    prefetch(pages) hands pages to the pool in batches without counting them
+    as requests; BFSProblem, DijkstrasProblem and WikiracerProblem call it on
+    the front of their frontier when given `prefetch`. get_links(page) counts
+    the request, exactly as the sequential search would, and returns the
+    page's links, waiting for the pool if needed. The search itself, with its
+    visited set, stays in this process, so paths and self.requests are
+    identical to a sequential run.
+
+    Usage of ParallelInternet:
+    internet = ParallelInternet(Internet, workers = 8)
+    BFSProblem(internet, prefetch = 128).bfs(source, goal)
+    internet.close()
+    """
+
+    def __init__(self, internet_factory: Callable = Internet, workers: int = None):
+        self.internet = internet_factory()
+        self.requests = self.internet.requests
+        self.at_time = getattr(self.internet, "at_time", None)
+        self.workers = workers or os.cpu_count() or 1
+        self.__executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker, initargs=(internet_factory,))
+        self.__pending = dict()
+        self.__unmerged = list()
+        self.__tables = dict()
+        self.__lock = threading.Lock()
+
+    def get_page(self, page):
+        return self.internet.get_page(page)
+
+    def get_random(self):
+        return self.internet.get_random()
+
+    def prefetch(self, pages):
+        pages = [page for page in dict.fromkeys(pages) if page not in self.__pending]
+        if not pages:
+            return
+        for page in pages:
+            check_page(page)
+        size = min(MAX_BATCH, -(-len(pages) // self.workers))
+        for i in range(0, len(pages), size):
+            self.__submit(pages[i:i + size])
+
+    def get_links(self, page) -> List[str]:
+        check_page(page)
+        self.requests.append(page)
+        pending = self.__pending.pop(page, None)
+        if pending is None:
+            pending = self.__submit([page])
+            del self.__pending[page]
+        (future, index) = pending
+        (pid, _, _, arrays) = future.result()
+        with self.__lock:
+            self.__merge()
+            titles = self.__tables[pid]
+        if isinstance(arrays[index], Exception):
+            raise arrays[index]
+        return [titles[id] for id in arrays[index]]
+
+    def close(self):
+        self.__executor.shutdown(wait=True, cancel_futures=True)
+
+    def __submit(self, pages):
+        future = self.__executor.submit(_expand, pages)
+        with self.__lock:
+            self.__unmerged.append(future)
+        for index, page in enumerate(pages):
+            self.__pending[page] = (future, index)
+        return self.__pending[pages[-1]]
+
+    def __merge(self):
+        # A worker runs its batches one at a time and their results arrive in that order, so every
+        # title a finished batch refers to was sent by it or by an earlier batch that is also done.
+        unmerged = list()
+        for future in self.__unmerged:
+            if not future.done():
+                unmerged.append(future)
+            elif future.exception() is None:
+                (pid, start, titles, _) = future.result()
+                table = self.__tables.setdefault(pid, [])
+                if len(table) < start + len(titles):
+                    table.extend([None] * (start + len(titles) - len(table)))
+                table[start:start + len(titles)] = titles
+        self.__unmerged = unmerged
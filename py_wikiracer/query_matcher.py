@@ -0,0 +1,48 @@
+from typing import Iterable, Set
+import re
+
+
+class QueryMatcher:
+    """
+    Finds which of several query terms occur in a text, in a single pass.
+
+    All terms are compiled into one regex of zero-width lookaheads, longest term
+    first, which is tried at every position of the text. At a given position only
+    the longest term starting there is reported, so each term also marks the
+    shorter terms it contains as found. Scanning stops as soon as every term has
+    been seen.
+
+    Usage of QueryMatcher:
+    matcher = QueryMatcher(["ham", "cheese"])
+    matcher.scan("green eggs and ham")  # {"ham"}
+    """
+
+    def __init__(self, terms: Iterable[str], ignore_case: bool = False):
+        self.ignore_case = ignore_case
+        self.terms = frozenset(term for term in terms if term)
+        self.implies = {term: {other for other in self.terms if self.__fold(other) in self.__fold(term)} for term in self.terms}
+        self.by_match = {self.__fold(term): term for term in self.terms}
+        alternatives = "|".join(re.escape(term) for term in sorted(self.terms, key=len, reverse=True))
+        self.pattern = re.compile(f"(?=({alternatives}))", re.IGNORECASE if ignore_case else 0) if self.terms else None
+        self.scanned = 0
+
+    def __fold(self, text):
+        return text.lower() if self.ignore_case else text
+
+    def scan(self, text: str) -> Set[str]:
+        """
+        Returns the set of terms found in `text`. self.scanned is set to how many characters were looked at.
+        """
+        found = set()
+        self.scanned = 0
+        if self.pattern is None:
+            return found
+        for match in self.pattern.finditer(text):
+            term = self.by_match[self.__fold(match.group(1))]
+            if term not in found:
+                found.update(self.implies[term])
+                if len(found) == len(self.terms):
+                    self.scanned = match.end(1)
+                    return found
+        self.scanned = len(text)
+        return found
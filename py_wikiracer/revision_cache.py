@@ -0,0 +1,92 @@
+from typing import Dict, Optional
+import sqlite3
+import threading
+
+REVISION_CACHE_FILE = "wiki_revisions.sqlite"
+
+
+class RevisionCache:
+    """
+    Remembers which revision (oldid) of each page was current at a given time,
+    keyed by (page, at_time), so a historical Internet reads a page's history
+    at most once. If `path` is given, revisions are also kept in a SQLite file
+    there and are shared with later (or concurrent) processes.
+
+    revisions(at_time) returns every revision resolved for at_time: the
+    revision set a race ran against. pin(name, at_time) names such a set so
+    later runs can find it again with pinned(name) and race against the same
+    revisions (and the pages already cached for them).
+
+    Usage of RevisionCache:
+    revisions = RevisionCache("wiki_revisions.sqlite")
+    revisions.put("/wiki/A", "20100401000000", "353154316")
+    revisions.get("/wiki/A", "20100401000000")  # "353154316"
+    revisions.pin("latest", "20100401000000")
+    revisions.pinned("latest")  # "20100401000000"
+    """
+
+    def __init__(self, path=None):
+        self.entries = dict()
+        self.pins = dict()
+        self.hits = 0
+        self.misses = 0
+        self.__lock = threading.Lock()
+        self.__sidecar = None
+        if path is not None:
+            self.__sidecar = sqlite3.connect(str(path), check_same_thread=False, timeout=60)
+            self.__sidecar.execute("PRAGMA journal_mode=WAL")
+            self.__sidecar.execute("CREATE TABLE IF NOT EXISTS revisions (page TEXT, at_time TEXT, oldid TEXT, PRIMARY KEY (page, at_time))")
+            self.__sidecar.execute("CREATE TABLE IF NOT EXISTS snapshots (name TEXT PRIMARY KEY, at_time TEXT)")
+            self.__sidecar.commit()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, page: str, at_time) -> Optional[str]:
+        key = (page, str(at_time))
+        with self.__lock:
+            oldid = self.entries.get(key)
+            if oldid is None and self.__sidecar is not None:
+                row = self.__sidecar.execute("SELECT oldid FROM revisions WHERE page = ? AND at_time = ?", key).fetchone()
+                if row is not None:
+                    oldid = self.entries[key] = row[0]
+            if oldid is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return oldid
+
+    def put(self, page: str, at_time, oldid: str) -> None:
+        key = (page, str(at_time))
+        with self.__lock:
+            self.entries[key] = oldid
+            if self.__sidecar is not None:
+                self.__sidecar.execute("INSERT OR REPLACE INTO revisions VALUES (?, ?, ?)", key + (oldid,))
+                self.__sidecar.commit()
+
+    def revisions(self, at_time) -> Dict[str, str]:
+        with self.__lock:
+            if self.__sidecar is not None:
+                for page, oldid in self.__sidecar.execute("SELECT page, oldid FROM revisions WHERE at_time = ?", (str(at_time),)):
+                    self.entries[(page, str(at_time))] = oldid
+            return {page: oldid for (page, page_time), oldid in self.entries.items() if page_time == str(at_time)}
+
+    def pin(self, name: str, at_time) -> None:
+        with self.__lock:
+            self.pins[name] = str(at_time)
+            if self.__sidecar is not None:
+                self.__sidecar.execute("INSERT OR REPLACE INTO snapshots VALUES (?, ?)", (name, str(at_time)))
+                self.__sidecar.commit()
+
+    def pinned(self, name: str) -> Optional[str]:
+        with self.__lock:
+            if self.__sidecar is not None:
+                row = self.__sidecar.execute("SELECT at_time FROM snapshots WHERE name = ?", (name,)).fetchone()
+                if row is not None:
+                    self.pins[name] = row[0]
+            return self.pins.get(name)
+
+    def close(self):
+        if self.__sidecar is not None:
+            self.__sidecar.close()
+            self.__sidecar = None
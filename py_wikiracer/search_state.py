@@ -0,0 +1,52 @@
+from array import array
+from typing import List
+
+
+class SearchState:
+    """
+    Shared bookkeeping for the search problems.
+
+    Page titles are interned to integer ids, and each frontier entry is a
+    (node id, parent entry) pair stored in two flat arrays. Frontiers hold
+    entry numbers instead of path lists, and the path to an entry is only
+    rebuilt, by following parent pointers, once the goal has been found.
+
+    Usage of SearchState:
+    state = SearchState()
+    root = state.push("/wiki/Calvin_Li")
+    child = state.push("/wiki/Hubei", root)
+    state.path(child)  # ["/wiki/Calvin_Li", "/wiki/Hubei"]
+    """
+    ROOT = -1
+
+    def __init__(self):
+        self.ids = dict()
+        self.titles = list()
+        self.nodes = array("l")
+        self.parents = array("l")
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def intern(self, title: str) -> int:
+        node = self.ids.get(title)
+        if node is None:
+            node = self.ids[title] = len(self.titles)
+            self.titles.append(title)
+        return node
+
+    def push(self, title: str, parent: int = ROOT) -> int:
+        self.nodes.append(self.intern(title))
+        self.parents.append(parent)
+        return len(self.nodes) - 1
+
+    def title(self, entry: int) -> str:
+        return self.titles[self.nodes[entry]]
+
+    def path(self, entry: int) -> List[str]:
+        path = list()
+        while entry != SearchState.ROOT:
+            path.append(self.titles[self.nodes[entry]])
+            entry = self.parents[entry]
+        path.reverse()
+        return path
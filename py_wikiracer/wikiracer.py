@@ -1,8 +1,16 @@
 from py_wikiracer.internet import Internet
-from typing import List
+from py_wikiracer.search_state import SearchState
+from py_wikiracer.link_cache import LinkCache
+from py_wikiracer.heuristics import USELESS, LinkModel, TierHeuristic, load_useful, title_words
+from py_wikiracer.query_matcher import QueryMatcher
+from py_wikiracer.metrics import Metrics
+from typing import Iterable, Iterator, List, Tuple
+from html import unescape
 from html.parser import HTMLParser
+import re
 from collections import deque, defaultdict
-from heapq import heapify, heappush, heappop
+from itertools import islice
+from heapq import heappush, heappop
 
 class MyHTMLParser(HTMLParser):
     def handle_starttag(self, tag, attrs):
@@ -12,188 +20,614 @@ class MyHTMLParser(HTMLParser):
                     self.urls.append(v)
 
 
+def html_parser_links(html: str) -> List[str]:
+    """
+    The original HTMLParser-based link extractor, kept as the reference that Parser must agree with.
+    """
+    links = list()
+    parser = MyHTMLParser()
+    parser.urls = list()
+    parser.feed(html)
+    for url in parser.urls:
+        if "/wiki/" in url:
+            if len(set(url.replace("/wiki/", "")).intersection(set(Internet.DISALLOWED))) == 0:
+                links.append(url)
+    return list(dict.fromkeys(links))
+
+
 class Parser:
+    # One pass over the page: comments and <script>/<style> bodies are matched
+    # (and skipped) so that links inside them are ignored, just like HTMLParser.
+    LINK_PATTERN = re.compile(
+        r"<!--.*?-->"
+        r"|<(?:script|style)\b.*?</(?:script|style)\s*>"
+        r"|<a\s(?:[^>\"']|\"[^\"]*\"|'[^']*')*?(?<=\s)href\s*=\s*(?:\"([^\"]*)\"|'([^']*)'|([^\s>]*))",
+        re.IGNORECASE | re.DOTALL)
+    DISALLOWED_PATTERN = re.compile("[" + re.escape("".join(Internet.DISALLOWED)) + "]")
+    # Where a scan of part of a page can still change as more of it arrives: a comment, script
+    # or style that is not closed yet, an <a tag whose ">" is not in sight, or the start of one
+    # of those at the very end. iter_links_in_chunks holds the page back from there.
+    UNDECIDED_PATTERN = re.compile(
+        r"<!--|<(?:script|style)\b|<a\s(?!(?:[^>\"']|\"[^\"]*\"|'[^']*')*>)"
+        r"|<(?:!-?|a|s|sc|scr|scri|scrip|st|sty|styl)?\Z",
+        re.IGNORECASE | re.DOTALL)
+    TAG_PATTERN = re.compile(r"<[^>]*>")
+
     @staticmethod
     def get_links_in_page(html: str) -> List[str]:
-        links = list()
-        disallowed = Internet.DISALLOWED
-        parser = MyHTMLParser()
-        parser.urls = list()
-        parser.feed(html)
-        urls = parser.urls
-        for url in urls:
-            if "/wiki/" in url:
-                if len(set(url.replace("/wiki/","")).intersection(set(disallowed))) == 0:
-                    links.append(url)
-        links = list(dict.fromkeys(links))
+        return list(dict.fromkeys(url for url, _ in Parser._wiki_links(html)))
+
+    @staticmethod
+    def iter_links_in_page(html: str) -> Iterator[str]:
+        """
+        Yields the links of get_links_in_page, in the same order, as the page is scanned.
+        """
+        seen = set()
+        for url, _ in Parser._wiki_links(html):
+            if url not in seen:
+                seen.add(url)
+                yield url
+
+    @staticmethod
+    def iter_links_in_chunks(chunks: Iterable[str]) -> Iterator[str]:
+        """
+        Like iter_links_in_page, for a page that arrives in pieces (see Internet.stream_page).
+        Each chunk is scanned as far as more of the page cannot change the scan (see
+        UNDECIDED_PATTERN), and the rest is held back for the next chunk, so the links are
+        exactly those of the whole page, however it is split.
+        """
+        seen = set()
+        buffer = ""
+        for chunk in chunks:
+            buffer += chunk
+            (matches, cut) = Parser._decided_matches(buffer)
+            for url, _ in Parser._wiki_urls(matches):
+                if url not in seen:
+                    seen.add(url)
+                    yield url
+            buffer = buffer[cut:]
+        for url, _ in Parser._wiki_links(buffer):
+            if url not in seen:
+                seen.add(url)
+                yield url
+
+    @staticmethod
+    def get_anchors_in_page(html: str) -> List[Tuple[str, str]]:
+        """
+        Like get_links_in_page, but pairs every link with its anchor text. A link that appears
+        several times gets all of its anchor texts, separated by spaces.
+        """
+        anchors = dict()
+        for url, match in Parser._wiki_links(html):
+            start = html.find(">", match.end()) + 1
+            end = html.find("</a>", start)
+            text = unescape(Parser.TAG_PATTERN.sub("", html[start:end])) if start and end != -1 else ""
+            anchors[url] = f"{anchors[url]} {text}" if url in anchors else text
+        return list(anchors.items())
+
+    @staticmethod
+    def _wiki_links(html: str):
+        return Parser._wiki_urls(Parser.LINK_PATTERN.finditer(html))
+
+    @staticmethod
+    def _wiki_urls(matches):
+        disallowed = Parser.DISALLOWED_PATTERN.search
+        for match in matches:
+            if match.lastindex is None:
+                continue
+            url = match.group(match.lastindex)
+            if "&" in url:
+                url = unescape(url)
+            if "/wiki/" not in url:
+                continue
+            if disallowed(url.replace("/wiki/", "")) is None:
+                yield url, match
+
+    @staticmethod
+    def _decided_matches(html: str):
+        # The LINK_PATTERN matches at the start of a partial page that the rest of the page
+        # cannot change, and the position a scan of the whole page would go on from.
+        undecided = Parser.UNDECIDED_PATTERN.finditer(html)
+        candidate = next(undecided, None)
+        matches = list()
+        position = 0
+        for match in Parser.LINK_PATTERN.finditer(html):
+            # Candidates inside an earlier match were never tried by the scan.
+            while candidate is not None and candidate.start() < position:
+                candidate = next(undecided, None)
+            if candidate is not None and candidate.start() < match.start():
+                return (matches, candidate.start())
+            # An unquoted href value may go on in the next chunk, and one starting with a quote
+            # is only unquoted because its closing quote has not arrived.
+            if match.lastindex == 3 and (match.end() == len(html) or match.group(3)[:1] in ("\"", "'")):
+                return (matches, match.start())
+            matches.append(match)
+            position = match.end()
+        while candidate is not None and candidate.start() < position:
+            candidate = next(undecided, None)
+        return (matches, len(html) if candidate is None else candidate.start())
+
+
+def get_links(internet, page, metrics: Metrics = None):
+    # Graph backends such as LinkGraphInternet hand back links directly, with no HTML to parse.
+    if hasattr(internet, "get_links"):
+        if metrics is None:
+            return internet.get_links(page)
+        return metrics.timed("links", internet.get_links, page)
+    if metrics is None:
+        return Parser.get_links_in_page(internet.get_page(page))
+    html = metrics.timed("fetch", internet.get_page, page)
+    metrics.count("bytes_parsed", len(html))
+    return metrics.timed("parse", Parser.get_links_in_page, html)
+
+
+def stream_links(internet, page, metrics: Metrics = None) -> Iterator[str]:
+    """
+    Yields the links of get_links(internet, page) as they are found. Backends that can
+    stream (Internet.stream_page) are parsed chunk by chunk while the page downloads, so a
+    search that stops at the goal link skips parsing the rest of the page (which is still
+    downloaded, to be cached).
+    """
+    if hasattr(internet, "get_links"):
+        return iter(get_links(internet, page, metrics))
+    if hasattr(internet, "stream_page"):
+        links = Parser.iter_links_in_chunks(internet.stream_page(page))
+        # Downloading and parsing are interleaved, so they are timed together.
+        return links if metrics is None else metrics.timed_iter("stream", links)
+    if metrics is None:
+        return Parser.iter_links_in_page(internet.get_page(page))
+    html = metrics.timed("fetch", internet.get_page, page)
+    metrics.count("bytes_parsed", len(html))
+    return metrics.timed_iter("parse", Parser.iter_links_in_page(html))
+
+
+class CachedInternet:
+    """
+    Wraps an Internet (or any stand-in for one) so that every page's links are
+    extracted at most once. get_links(page) answers from `cache`, a LinkCache,
+    and only calls the wrapped Internet on a miss, so a cache hit is not added
+    to self.requests. resolve_revisions skips pages whose links are cached, as
+    they are never fetched. Everything else is passed through to the wrapped Internet.
+    """
+    def __init__(self, internet: Internet, cache: LinkCache = None, metrics: Metrics = None):
+        self.internet = internet
+        self.cache = LinkCache() if cache is None else cache
+        self.metrics = metrics
+
+    def __getattr__(self, name):
+        return getattr(self.internet, name)
+
+    def get_links(self, page):
+        at_time = getattr(self.internet, "at_time", None)
+        links = self.cache.get(page, at_time)
+        if self.metrics is not None:
+            self.metrics.count("link_cache_hits" if links is not None else "link_cache_misses")
+        if links is None:
+            links = get_links(self.internet, page, self.metrics)
+            self.cache.put(page, at_time, links)
         return links
 
+    def resolve_revisions(self, pages):
+        at_time = getattr(self.internet, "at_time", None)
+        return self.internet.resolve_revisions([page for page in pages if not self.cache.contains(page, at_time)])
+
+
+def prefetch_pages(internet, pages):
+    # Internet stand-ins (like the ones in the tests) may not support prefetching.
+    if hasattr(internet, "prefetch"):
+        internet.prefetch(pages)
+
+
+def is_historical(internet):
+    return getattr(internet, "at_time", None) is not None and hasattr(internet, "resolve_revisions")
+
+
+def resolve_layer(internet, pages):
+    # A historical Internet needs each page's revision before fetching it; look up a whole layer's at once.
+    if is_historical(internet):
+        internet.resolve_revisions(pages)
+
 
 class BFSProblem:
-    def __init__(self, internet: Internet):
+    def __init__(self, internet: Internet, prefetch: int = 0, metrics: Metrics = None):
         self.internet = internet
+        self.prefetch = prefetch
+        self.metrics = metrics
         self.visited = set()
         self.queue = deque()
+        self.state = SearchState()
 
     def bfs(self, source = "/wiki/Calvin_Li", goal = "/wiki/Wikipedia"):
-        path = [source]
-        self.queue = [(source, path)]
+        metrics = self.metrics
+        self.state = state = SearchState()
+        self.queue = deque([state.push(source)])
+        self.visited = {source}
         if source == goal:
             self.internet.get_page(source)
-            return path + [source]
+            return [source, source]
+        layer_left = 0
         while self.queue:
-            (vertex, path) = self.queue.pop(0)
-            self.visited.add(vertex)
-            html = self.internet.get_page(vertex)
-            vertex_links = Parser.get_links_in_page(html)
+            if not layer_left:
+                # Layer d+1 is only queued while layer d is expanded, so the queue now holds exactly one layer.
+                layer_left = len(self.queue)
+                resolve_layer(self.internet, [state.title(e) for e in self.queue])
+            layer_left -= 1
+            entry = self.queue.popleft()
+            if self.prefetch:
+                prefetch_pages(self.internet, [state.title(e) for e in islice(self.queue, self.prefetch)])
+            if metrics is not None:
+                metrics.expand(state.title(entry), len(self.queue) + 1)
+            vertex_links = stream_links(self.internet, state.title(entry), metrics)
             for next in vertex_links:
+                if next == goal:
+                    return state.path(entry) + [next]
                 if next not in self.visited:
-                    if next == goal:
-                        return path + [next]
-                    else:
-                        self.queue.append((next, path+[next]))
+                    self.visited.add(next)
+                    self.queue.append(state.push(next, entry))
         return None
 
 
 class DFSProblem:
-    def __init__(self, internet: Internet):
+    def __init__(self, internet: Internet, prefetch: int = 0, metrics: Metrics = None):
         self.internet = internet
+        self.prefetch = prefetch
+        self.metrics = metrics
         self.visited = set()
         self.stack = deque()
+        self.path = list()
+        self.state = SearchState()
 
     def dfs(self, source = "/wiki/Calvin_Li", goal = "/wiki/Wikipedia"):
-        path = [source]
-        self.stack = [(source, path)]
+        metrics = self.metrics
+        self.state = state = SearchState()
+        self.stack = [state.push(source)]
         if source == goal:
             self.internet.get_page(source)
-            return path + [source]
+            return [source, source]
         while self.stack:
-            (vertex, path) = self.stack.pop()
+            entry = self.stack.pop()
+            vertex = state.title(entry)
+            if self.prefetch:
+                prefetch_pages(self.internet, [state.title(e) for e in self.stack[:-self.prefetch - 1:-1]])
             self.visited.add(vertex)
-            html = self.internet.get_page(vertex)
-            vertex_links = Parser.get_links_in_page(html)
+            if metrics is not None:
+                metrics.expand(vertex, len(self.stack) + 1)
+            vertex_links = stream_links(self.internet, vertex, metrics)
             for next in vertex_links:
                 if next not in self.visited:
                     if next == goal:
-                        return path + [next]
+                        return state.path(entry) + [next]
                     else:
-                        self.stack.append((next, path + [next]))
+                        self.stack.append(state.push(next, entry))
         return None
 
+    def iddfs(self, source = "/wiki/Calvin_Li", goal = "/wiki/Wikipedia", max_depth: int = 6, cache: LinkCache = None):
+        """
+        Iterative-deepening DFS: depth-limited searches of 1, 2, ... max_depth clicks, so the
+        path found is a shortest one. Each round keeps a single shared path and one link
+        iterator per level, so memory grows with the depth rather than depth x fan-out.
+        Pages already on the path are skipped, which prunes cycles as they are met.
+
+        Links are memoized in `cache` (a fresh LinkCache by default) across rounds, so
+        deepening never downloads a page twice. Links are tried in the same order as dfs.
+        """
+        links = CachedInternet(self.internet, cache, self.metrics)
+        if source == goal:
+            self.internet.get_page(source)
+            return [source, source]
+        for depth in range(1, max_depth + 1):
+            if self.metrics is not None:
+                self.metrics.event("deepen", depth=depth)
+            (path, cut_off) = self.__depth_limited(links, source, goal, depth)
+            if path is not None or not cut_off:
+                return path
+        return None
+
+    def __depth_limited(self, links, source, goal, depth):
+        # Returns (path, cut_off); cut_off tells whether any page was left unexpanded at the depth limit.
+        metrics = self.metrics
+        self.path = path = [source]
+        on_path = {source}
+        self.stack = iterators = [reversed(links.get_links(source))]
+        cut_off = False
+        while iterators:
+            for next in iterators[-1]:
+                if next == goal:
+                    return (path + [next], cut_off)
+                if next not in on_path:
+                    break
+            else:
+                iterators.pop()
+                on_path.discard(path.pop())
+                continue
+            if len(path) == depth:
+                cut_off = True
+                continue
+            if metrics is not None:
+                metrics.expand(next, len(path))
+            path.append(next)
+            on_path.add(next)
+            iterators.append(reversed(links.get_links(next)))
+        return (None, cut_off)
+
 
 class DijkstrasProblem:
-    def __init__(self, internet: Internet):
+    def __init__(self, internet: Internet, prefetch: int = 0, metrics: Metrics = None):
         self.internet = internet
+        self.prefetch = prefetch
+        self.metrics = metrics
         self.visited = set()
         self.heap = list()
+        self.state = SearchState()
+
+    def dijkstras(self, source = "/wiki/Calvin_Li", goal = "/wiki/Wikipedia", costFn = lambda x, y: len(y), goalFn = None, heuristicFn = None,
+                  costsFn = None):
+        """
+        costFn(page, link) must not be negative. goalFn(link), if given, replaces the
+        `link == goal` test. Heap entries are (priority, page, entry); the SearchState entry
+        number doubles as a tie-break counter, so paths are never compared. Stale entries
+        left behind by a cheaper push are skipped when popped (lazy deletion).
+
+        heuristicFn(link), if given, turns this into A*: a link's priority is its cost plus
+        heuristicFn(link), which must be a consistent lower bound on the remaining cost
+        (for example Landmarks.heuristic). Links it scores as infinite cannot reach the
+        goal and are never queued.
 
-    def dijkstras(self, source = "/wiki/Calvin_Li", goal = "/wiki/Wikipedia", costFn = lambda x, y: len(y)):
-        heapify(self.heap)
-        path = [source]
-        heappush(self.heap, (0, source, path))
+        costsFn(page, links), if given, returns the costs of all of a page's links in one
+        call, in place of costFn for each link (see TierHeuristic.score_all).
+
+        On a historical Internet, each layer of entries tied at the cheapest priority has
+        its revisions resolved together before the first of them is fetched.
+        """
+        self.state = state = SearchState()
+        self.visited = set()
+        self.heap = [(0, source, state.push(source))]
         lowest_cost = {source:0}
+        if goalFn is None:
+            goalFn = lambda page: page == goal
+        metrics = self.metrics
+        push, pop, cost_of, estimate, costs_of = heappush, heappop, costFn, heuristicFn, costsFn
+        if metrics is not None:
+            push = lambda heap, item: metrics.timed("heap", heappush, heap, item)
+            pop = lambda heap: metrics.timed("heap", heappop, heap)
+            cost_of = lambda node1, node2: metrics.timed("heuristic", costFn, node1, node2)
+            if heuristicFn is not None:
+                estimate = lambda page: metrics.timed("heuristic", heuristicFn, page)
+            if costsFn is not None:
+                costs_of = lambda page, links: metrics.timed("heuristic", costsFn, page, links)
         if source == goal:
             self.internet.get_page(source)
-            return path + [source]
+            return [source, source]
+        (historical, resolved_priority) = (is_historical(self.internet), None)
         while self.heap:
-            (cost, vertex, path) = heappop(self.heap)
+            (priority, vertex, entry) = pop(self.heap)
+            if vertex in self.visited:
+                continue
+            if historical and priority != resolved_priority:
+                resolved_priority = priority
+                resolve_layer(self.internet, [vertex] + [v for (p, v, _) in self.heap if p == priority and v not in self.visited])
             self.visited.add(vertex)
-            html = self.internet.get_page(vertex)
-            vertex_neighbors = Parser.get_links_in_page(html)
-            for neighbor in vertex_neighbors:
-                if neighbor not in self.visited:
-                    neighbor_path = path + [neighbor]
-                    if neighbor == goal:
-                        return neighbor_path
-                    if neighbor not in lowest_cost.keys():
-                        lowest_cost[neighbor] = float("inf")
-                    neighbor_cost = cost + costFn(vertex, neighbor)
-                    if neighbor_cost < lowest_cost[neighbor]:
-                        lowest_cost[neighbor] = neighbor_cost
-                        heappush(self.heap, (lowest_cost[neighbor], neighbor, neighbor_path))
-                else:
+            cost = lowest_cost[vertex]
+            if self.prefetch:
+                # The first slots of the heap hold some of the cheapest entries, which is close enough for a prefetch.
+                prefetch_pages(self.internet, [v for (_, v, _) in self.heap[:self.prefetch] if v not in self.visited])
+            if metrics is not None:
+                metrics.expand(vertex, len(self.heap) + 1)
+            vertex_neighbors = stream_links(self.internet, vertex, metrics)
+            if costs_of is None:
+                edges = ((neighbor, None) for neighbor in vertex_neighbors)
+            else:
+                vertex_neighbors = list(vertex_neighbors)
+                edges = zip(vertex_neighbors, costs_of(vertex, vertex_neighbors))
+            for (neighbor, edge_cost) in edges:
+                if neighbor in self.visited:
                     continue
+                if goalFn(neighbor):
+                    return state.path(entry) + [neighbor]
+                best = lowest_cost.get(neighbor)
+                # Costs are never negative, so a neighbor already reached for `cost` or less cannot improve.
+                if best is not None and best <= cost:
+                    continue
+                neighbor_cost = cost + (cost_of(vertex, neighbor) if edge_cost is None else edge_cost)
+                if best is None or neighbor_cost < best:
+                    priority = neighbor_cost
+                    if estimate is not None:
+                        priority += estimate(neighbor)
+                        if priority == float("inf"):
+                            continue
+                    lowest_cost[neighbor] = neighbor_cost
+                    push(self.heap, (priority, neighbor, state.push(neighbor, entry)))
         return None
 
 
+class BidirectionalProblem:
+    """
+    Searches forward from the source (downloading pages) and backward from the goal
+    (asking `backlinks.get_backlinks(page)`, which downloads nothing) one layer at a time,
+    always growing the smaller frontier, until the two meet in the middle.
+    `backlinks` is a BacklinkIndex or anything else with a get_backlinks method.
+
+    Backlinks are only hints: if the backward frontier runs out (the goal's area is not
+    indexed), the forward search carries on alone, like BFS, until it reaches a page
+    seen backward.
+    """
+    def __init__(self, internet: Internet, backlinks):
+        self.internet = internet
+        self.backlinks = backlinks
+        self.forward_seen = dict()
+        self.backward_seen = dict()
+
+    def bidirectional(self, source = "/wiki/Calvin_Li", goal = "/wiki/Wikipedia"):
+        if source == goal:
+            self.internet.get_page(source)
+            return [source, source]
+        forward, backward = SearchState(), SearchState()
+        self.forward_seen = {source: forward.push(source)}
+        self.backward_seen = {goal: backward.push(goal)}
+        forward_layer = [self.forward_seen[source]]
+        backward_layer = [self.backward_seen[goal]]
+        while forward_layer:
+            if not backward_layer or len(forward_layer) <= len(backward_layer):
+                resolve_layer(self.internet, [forward.title(entry) for entry in forward_layer])
+                forward_layer, meeting = self._expand(forward_layer, forward, self.forward_seen, self.backward_seen,
+                                                      lambda page: get_links(self.internet, page))
+                if meeting is not None:
+                    (entry, page) = meeting
+                    return forward.path(entry) + backward.path(self.backward_seen[page])[::-1]
+            else:
+                backward_layer, meeting = self._expand(backward_layer, backward, self.backward_seen, self.forward_seen,
+                                                       self.backlinks.get_backlinks)
+                if meeting is not None:
+                    (entry, page) = meeting
+                    return forward.path(self.forward_seen[page]) + backward.path(entry)[::-1]
+        return None
+
+    @staticmethod
+    def _expand(layer, state, seen, other_seen, neighbors):
+        next_layer = list()
+        for entry in layer:
+            for page in neighbors(state.title(entry)):
+                if page in other_seen:
+                    return next_layer, (entry, page)
+                if page not in seen:
+                    seen[page] = state.push(page, entry)
+                    next_layer.append(seen[page])
+        return next_layer, None
+
+
 class WikiracerProblem:
-    def __init__(self, internet: Internet):
+    def __init__(self, internet: Internet, backlinks = None, link_cache: LinkCache = None, metrics: Metrics = None, prefetch: int = 0,
+                 model: LinkModel = None):
         self.internet = internet
-        self.useless = {"A","a","An","an","the","The","of","for","in","on","Main","Page","to","and","from","by","ISBN"}
-        self.useful = set()
+        self.backlinks = backlinks
+        self.metrics = metrics
+        self.prefetch = prefetch
+        # An optional trained LinkModel (see py_wikiracer.link_model) orders the links the tiers cannot tell apart.
+        self.model = model
+        self.links = CachedInternet(internet, link_cache, metrics)
+        self.useless = USELESS
+        self.useful = load_useful()
 
     def _find_neighbors(self, vertex):
         if vertex == "random":
-            html = self.internet.get_random()
-        else:
-            html = self.internet.get_page(vertex)
-        links = Parser.get_links_in_page(html)
-        return links
+            return Parser.get_links_in_page(self.internet.get_random())
+        return self.links.get_links(vertex)
 
     def wikiracer(self, source = "/wiki/Calvin_Li", goal = "/wiki/Wikipedia"):
-        f = open("py_wikiracer/wiki.txt", "r")
-        for i in f:
-            self.useful.add(i.strip())
-        dij = DijkstrasProblem(self.internet)
+        if self.backlinks is not None:
+            return BidirectionalProblem(self.links, self.backlinks).bidirectional(source, goal)
+        dij = DijkstrasProblem(self.links, prefetch = self.prefetch, metrics = self.metrics)
         source_bfs_links = self._find_neighbors(source)
         source_bfs_links.append(source)
         if goal == source or goal in source_bfs_links:
             return [source] + [goal]
         goal_bfs_links = self._find_neighbors(goal)
         goal_bfs_links.append(goal)
+        # The goal's neighbors are the layer sampled below.
+        resolve_layer(self.links, goal_bfs_links)
         random_bfs_links = self._find_neighbors("random")
-        common_links = set(random_bfs_links).intersection(set(source_bfs_links))
-        self.goal_bfs2_links = list()
+        source_link_set = set(source_bfs_links)
+        common_links = set(random_bfs_links).intersection(source_link_set)
+        self.goal_bfs2_links = set()
+        goal_bfs2_count = 0
         goal_bfs_good_links = set()
         samples = set()
-        list_of_lists = [i.replace("/wiki/","").replace("(","").replace(")","").split("_") for i in source_bfs_links]
-        source_words = [val for sublist in list_of_lists for val in sublist]
-        list_of_lists = [i.replace("/wiki/", "").replace("(", "").replace(")", "").split("_") for i in goal_bfs_links]
-        goal_words = [val for sublist in list_of_lists for val in sublist]
-        self.keywords = set(source_words).intersection(set(goal_words))
-        for j in self.useless:
-            self.keywords.discard(j)
-        while len(goal_bfs_links) > 0:
-            sample = goal_bfs_links.pop(0)
-            if common_links is not None and sample not in common_links and sample != goal:
+        source_words = {word for link in source_bfs_links for word in title_words(link)}
+        goal_words = {word for link in goal_bfs_links for word in title_words(link)}
+        self.keywords = source_words.intersection(goal_words) - self.useless
+        self.x = set()
+        # Sample the goal's neighbors in order; only the links still waiting to be sampled count as goal neighbors below.
+        last_source = max((i for i, link in enumerate(goal_bfs_links) if link == source), default=-1)
+        next_sample = 0
+        while next_sample < len(goal_bfs_links):
+            sample = goal_bfs_links[next_sample]
+            next_sample += 1
+            if self.prefetch:
+                prefetch_pages(self.links, goal_bfs_links[next_sample:next_sample + self.prefetch])
+            remaining = len(goal_bfs_links) - next_sample
+            if sample not in common_links and sample != goal:
+                if self.metrics is not None:
+                    self.metrics.count("goal_samples")
                 sample_neighbors = self._find_neighbors(sample)
-                self.goal_bfs2_links = self.goal_bfs2_links + sample_neighbors
+                self.goal_bfs2_links.update(sample_neighbors)
+                goal_bfs2_count += len(sample_neighbors)
+                self.x.update(source_link_set.intersection(sample_neighbors))
                 samples.add(sample)
                 if goal in sample_neighbors:
                     goal_bfs_good_links.add(sample)
-            self.x = set(source_bfs_links).intersection(set(self.goal_bfs2_links))
-            if len(self.x) > 5 or source in (self.goal_bfs2_links + goal_bfs_links):
+            if len(self.x) > 5 or source in self.goal_bfs2_links or last_source >= next_sample:
                 break
-            if len(goal_bfs_links) > 200 and len(self.goal_bfs2_links) + len(goal_bfs_links) + len(samples) > 5000:
+            if remaining > 200 and goal_bfs2_count + remaining + len(samples) > 5000:
                 break
-            if len(goal_bfs_links) > 50 and len(self.goal_bfs2_links) + len(goal_bfs_links) + len(samples) > 10000:
+            if remaining > 50 and goal_bfs2_count + remaining + len(samples) > 10000:
                 break
-        costFn = lambda node1, node2: (9999999999 if (node2 in common_links)
-                                       else (0 if (node2 in goal_bfs_good_links)
-                                             else (0.1 if (node2 in goal_bfs_links or node2 in samples)
-                                                   else (1 if (node2 in self.useful or node2 in self.x)
-                                                         else (10 if (node2 in self.goal_bfs2_links)
-                                                               else (100 if (len(set(node2.replace("/wiki/","").replace("(", "").replace(")", "").split("_")).intersection(self.keywords))>0)
-                                                                     else (1000 if (node2 in self.goal_bfs2_links)
-                                                                           else 10000)))))))
-        path = dij.dijkstras(source, goal, costFn)
+        costFn = TierHeuristic(common = common_links,
+                               good = goal_bfs_good_links,
+                               near = samples.union(goal_bfs_links[next_sample:]),
+                               useful = self.useful.union(self.x),
+                               goal_neighborhood = self.goal_bfs2_links,
+                               keywords = self.keywords,
+                               model = self.model)
+        path = dij.dijkstras(source, goal, costFn, costsFn = lambda page, links: costFn.score_all(links))
         return path
 
 # KARMA
 class FindInPageProblem:
-    def __init__(self, internet: Internet):
-        self.internet = internet
-    # This Karma problem is a little different. In this, we give you a source page, and then ask you to make up some heuristics that will allow you to efficiently
-    #  find a page containing all of the words in `query`. Again, optimize for the fewest number of internet downloads, not for the shortest path.
-
-    def find_in_page(self, source = "/wiki/Calvin_Li", query = ["ham", "cheese"]):
+    """
+    Best-first search for a page whose HTML contains every word in `query`, trying
+    to download as few pages as possible.
 
-        raise NotImplementedError("Karma method find_in_page")
+    Each downloaded page is scanned once by a QueryMatcher. Its links are ranked by
+    how many query words the page itself contained plus twice the number of query
+    words in the link's anchor text or title (case-insensitive), so the pages most
+    likely to match are downloaded first; ties go to the page discovered first.
 
-        path = [source]
-
-        # find a path to a page that contains ALL of the words in query in any place within the page
-        # path[-1] should be the page that fulfills the query.
-        # YOUR CODE HERE
+    self.downloads and self.chars_scanned (characters of HTML run through the
+    matcher) describe the cost of the last query.
+    """
+    def __init__(self, internet: Internet, metrics: Metrics = None):
+        self.internet = internet
+        self.metrics = metrics
+        self.visited = set()
+        self.heap = list()
+        self.state = SearchState()
+        self.downloads = 0
+        self.chars_scanned = 0
 
-        return path # if no path exists, return None
+    def find_in_page(self, source = "/wiki/Calvin_Li", query = ["ham", "cheese"], max_downloads = None):
+        metrics = self.metrics
+        matcher = QueryMatcher(query)
+        words = [word.lower() for word in matcher.terms]
+        self.state = state = SearchState()
+        self.visited = set()
+        self.heap = [(0, state.push(source))]
+        self.downloads = 0
+        self.chars_scanned = 0
+        best = {source: 0}
+        while self.heap and (max_downloads is None or self.downloads < max_downloads):
+            (_, entry) = heappop(self.heap)
+            vertex = state.title(entry)
+            if vertex in self.visited:
+                continue
+            self.visited.add(vertex)
+            if metrics is None:
+                html = self.internet.get_page(vertex)
+            else:
+                metrics.expand(vertex, len(self.heap) + 1)
+                html = metrics.timed("fetch", self.internet.get_page, vertex)
+                metrics.count("bytes_parsed", len(html))
+            self.downloads += 1
+            found = matcher.scan(html)
+            self.chars_scanned += matcher.scanned
+            if len(found) == len(matcher.terms):
+                return state.path(entry)
+            anchors = Parser.get_anchors_in_page(html) if metrics is None else metrics.timed("parse", Parser.get_anchors_in_page, html)
+            for link, text in anchors:
+                if link in self.visited:
+                    continue
+                label = f"{text} {' '.join(title_words(link))}".lower()
+                priority = -(len(found) + 2 * sum(word in label for word in words))
+                if priority < best.get(link, 1):
+                    best[link] = priority
+                    heappush(self.heap, (priority, state.push(link, entry)))
+        return None
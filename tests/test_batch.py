@@ -0,0 +1,110 @@
+import json
+import time
+
+from py_wikiracer import batch
+from py_wikiracer.batch import group_by_goal, race_batch, read_races
+from py_wikiracer.heuristics import LinkModel
+from tests.test_search import GraphInternet
+
+GRAPH = {
+    "/wiki/A": ["/wiki/B", "/wiki/Hub"],
+    "/wiki/B": ["/wiki/C"],
+    "/wiki/C": ["/wiki/Goal"],
+    "/wiki/Hub": ["/wiki/C", "/wiki/Other"],
+    "/wiki/Goal": ["/wiki/Hub"],
+    "/wiki/Other": ["/wiki/A"],
+    "/wiki/Random": ["/wiki/Other"],
+}
+
+
+class RaceInternet(GraphInternet):
+    def __init__(self):
+        super().__init__(GRAPH)
+    def get_random(self):
+        return self.get_page("/wiki/Random")
+
+
+class SlowInternet(RaceInternet):
+    # Races starting at Slow take a while, so the races before them finish first.
+    def __init__(self):
+        super().__init__()
+        self.graph = dict(GRAPH, **{"/wiki/Slow": ["/wiki/Goal"]})
+    def get_page(self, page):
+        if page == "/wiki/Slow":
+            time.sleep(2)
+        return super().get_page(page)
+
+
+def test_read_and_group():
+    races = read_races(["# races", "/wiki/A /wiki/Goal", "", "/wiki/B\t/wiki/Other", "/wiki/Hub /wiki/Goal"])
+    assert races == [("/wiki/A", "/wiki/Goal"), ("/wiki/B", "/wiki/Other"), ("/wiki/Hub", "/wiki/Goal")]
+    assert group_by_goal(races) == [[("/wiki/A", "/wiki/Goal"), ("/wiki/Hub", "/wiki/Goal")], [("/wiki/B", "/wiki/Other")]]
+
+
+def test_read_races_reports_bad_lines():
+    errors = []
+    races = read_races(["/wiki/A /wiki/Goal", "/wiki/B", "   ", "/wiki/A /wiki/B /wiki/C", "/wiki/Hub /wiki/Goal"], errors)
+    assert races == [("/wiki/A", "/wiki/Goal"), ("/wiki/Hub", "/wiki/Goal")]
+    assert [(error["line"], error["text"]) for error in errors] == [(2, "/wiki/B"), (4, "/wiki/A /wiki/B /wiki/C")]
+    assert all(error["error"] for error in errors)
+    assert read_races(["/wiki/B"]) == []
+
+
+def test_batch_main_reports_bad_lines(tmp_path, capsys, monkeypatch):
+    monkeypatch.setattr(batch, "Internet", lambda at_time=None: RaceInternet())
+    races = tmp_path / "races.txt"
+    races.write_text("/wiki/A /wiki/Goal\nnot-a-race\n\n/wiki/B /wiki/Goal\n")
+    batch.main([str(races)])
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert lines[0]["line"] == 2 and lines[0]["text"] == "not-a-race"
+    assert [line["source"] for line in lines[1:]] == ["/wiki/A", "/wiki/B"]
+
+
+def test_batch_shares_work(monkeypatch):
+    monkeypatch.setattr(batch, "_link_caches", dict())
+    races = [("/wiki/A", "/wiki/Goal"), ("/wiki/A", "/wiki/Goal"), ("/wiki/B", "/wiki/Goal")]
+    results = list(race_batch(races, internet_factory=RaceInternet))
+    assert [result["path"] for result in results] == [["/wiki/A", "/wiki/Hub", "/wiki/C", "/wiki/Goal"],
+                                                      ["/wiki/A", "/wiki/Hub", "/wiki/C", "/wiki/Goal"],
+                                                      ["/wiki/B", "/wiki/C", "/wiki/Goal"]]
+    assert results[0]["requests"] > results[1]["requests"]
+    assert all(result["seconds"] >= 0 for result in results)
+
+
+def test_batch_process_pool(tmp_path, capsys):
+    races = tmp_path / "races.txt"
+    races.write_text("/wiki/A /wiki/Goal\n/wiki/B /wiki/Goal\n/wiki/Other /wiki/C\n")
+    results = sorted(race_batch(read_races(races.read_text().splitlines()), workers=2, internet_factory=RaceInternet,
+                                link_cache_path=tmp_path / "links.sqlite"), key=lambda result: result["source"])
+    assert [result["path"][-1] for result in results] == ["/wiki/Goal", "/wiki/Goal", "/wiki/C"]
+    assert json.loads(json.dumps(results[0])) == results[0]
+
+
+def test_batch_streams_each_race():
+    """
+    A race's result is yielded as soon as it finishes, not when the rest of its goal group does.
+    """
+    internets = []
+    def internet_factory():
+        internets.append(RaceInternet())
+        return internets[-1]
+    results = race_batch([("/wiki/A", "/wiki/Goal"), ("/wiki/B", "/wiki/Goal")], internet_factory=internet_factory)
+    assert next(results)["source"] == "/wiki/A"
+    assert len(internets) == 1
+
+    start = time.perf_counter()
+    results = race_batch([("/wiki/A", "/wiki/Goal"), ("/wiki/Slow", "/wiki/Goal")], workers=2, internet_factory=SlowInternet)
+    assert next(results)["source"] == "/wiki/A"
+    assert time.perf_counter() - start < 1.5
+    assert next(results)["path"] == ["/wiki/Slow", "/wiki/Goal"]
+    assert time.perf_counter() - start >= 2
+
+
+def test_batch_model(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch, "_link_models", dict())
+    model_path = str(tmp_path / "model.json")
+    LinkModel(weights = {"hub": -5.0}).save(model_path)
+    results = list(race_batch([("/wiki/A", "/wiki/Goal"), ("/wiki/B", "/wiki/Goal")], internet_factory=RaceInternet, model_path=model_path))
+    assert [result["path"][-1] for result in results] == ["/wiki/Goal", "/wiki/Goal"]
+    assert list(batch._link_models) == [model_path]
+    assert batch.shared_link_model() == None
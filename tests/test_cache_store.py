@@ -0,0 +1,53 @@
+import threading
+
+from py_wikiracer.cache_store import DirectoryCacheStore, SQLiteCacheStore
+from py_wikiracer.internet import Internet, cached_pages
+
+
+def test_directory_store(tmp_path):
+    store = DirectoryCacheStore(tmp_path / "wiki_cache")
+    assert store.get("/wiki/A") == None
+    store.put("/wiki/A", None, "<a>")
+    store.put("/wiki/A", "20100401000000", "<old>")
+    assert store.get("/wiki/A") == "<a>"
+    assert store.get("/wiki/A", "20100401000000") == "<old>"
+    assert list(store.items()) == [("/wiki/A", "<a>")]
+
+
+def test_sqlite_store_import(tmp_path):
+    directory = DirectoryCacheStore(tmp_path / "wiki_cache")
+    directory.put("/wiki/A", None, "<a href=\"/wiki/B\">" * 100)
+    directory.put("/wiki/Caf%C3%A9", "20100401000000", "café")
+    store = SQLiteCacheStore(tmp_path / "wiki_cache.sqlite")
+    assert store.import_directory(tmp_path / "wiki_cache") == 2
+    assert store.get("/wiki/A") == directory.get("/wiki/A")
+    assert store.get("/wiki/Caf%C3%A9", "20100401000000") == "café"
+    assert store.get("/wiki/Caf%C3%A9") == None
+    assert list(cached_pages(store, "20100401000000")) == [("/wiki/Caf%C3%A9", "café")]
+    store.close()
+
+
+def test_internet_reads_store(tmp_path):
+    store = SQLiteCacheStore(tmp_path / "wiki_cache.sqlite")
+    store.put("/wiki/A", None, '<a href="/wiki/B"></a>')
+    internet = Internet(cache=store, base_url="http://127.0.0.1:9")
+    assert internet.get_page("/wiki/A") == '<a href="/wiki/B"></a>'
+    assert internet.requests == ["/wiki/A"]
+
+
+def test_sqlite_store_concurrent_readers(tmp_path):
+    store = SQLiteCacheStore(tmp_path / "wiki_cache.sqlite")
+    for i in range(50):
+        store.put(f"/wiki/P{i}", None, f"page {i}")
+    results = []
+
+    def read():
+        results.append(all(store.get(f"/wiki/P{i}") == f"page {i}" for i in range(50)))
+
+    threads = [threading.Thread(target=read) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    store.put("/wiki/P50", None, "page 50")
+    for thread in threads:
+        thread.join()
+    assert results == [True] * 8
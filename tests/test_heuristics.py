@@ -0,0 +1,19 @@
+from py_wikiracer.heuristics import TierHeuristic, load_useful, title_words
+
+
+def test_tiers():
+    heuristic = TierHeuristic(common = {"/wiki/Common", "/wiki/Good"},
+                              good = {"/wiki/Good", "/wiki/Near"},
+                              near = {"/wiki/Near", "/wiki/Useful"},
+                              useful = {"/wiki/Useful", "/wiki/Two_Steps"},
+                              goal_neighborhood = {"/wiki/Two_Steps", "/wiki/Far"},
+                              keywords = {"Lake"})
+    assert heuristic.score_all(["/wiki/Common", "/wiki/Good", "/wiki/Near", "/wiki/Useful", "/wiki/Two_Steps",
+                                "/wiki/Far", "/wiki/Crystal_Lake_(Illinois)", "/wiki/Other"]) == [9999999999, 9999999999, 0, 0.1, 1, 10, 100, 10000]
+    assert heuristic("/wiki/Anything", "/wiki/Crystal_Lake_(Illinois)") == 100
+
+
+def test_useful_loaded_once():
+    assert load_useful() is load_useful()
+    assert "/wiki/Science" in load_useful()
+    assert title_words("/wiki/Republican_Party_(United_States)") == ["Republican", "Party", "United", "States"]
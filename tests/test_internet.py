@@ -0,0 +1,177 @@
+import gzip
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+from py_wikiracer.internet import Internet, pinned_snapshot
+from py_wikiracer.cache_store import DirectoryCacheStore
+from py_wikiracer.revision_cache import RevisionCache
+from py_wikiracer.wikiracer import BFSProblem
+
+LATENCY = 0.2
+
+PAGES = {
+    "/wiki/A": ["/wiki/B", "/wiki/C", "/wiki/D"],
+    "/wiki/B": ["/wiki/E"],
+    "/wiki/C": ["/wiki/F"],
+    "/wiki/D": ["/wiki/G"],
+    "/wiki/E": ["/wiki/Goal"],
+}
+
+
+class CannedHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.connections.add(self.client_address)
+        time.sleep(LATENCY)
+        if self.path == "/wiki/Special:Random":
+            self.send_response(302)
+            self.send_header("Location", "/wiki/A")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        path = self.path
+        if path.startswith("/w/index.php"):
+            query = parse_qs(urlsplit(path).query)
+            title = query["title"][0]
+            if query.get("action") == ["history"]:
+                self.server.history.append(title)
+                oldid = f'<a href="/w/index.php?title={title}&amp;oldid=1{len(title)}">prev</a>' if f"/wiki/{title}" in PAGES else ""
+                self.send_body(f"<ul>{oldid}</ul>".encode("utf-8"))
+                return
+            path = f"/wiki/{title}"
+        links = PAGES.get(path)
+        if links is None:
+            self.send_error(404)
+            return
+        self.send_body("".join(f'<a href="{link}">{link}</a>' for link in links).encode("utf-8"))
+
+    def send_body(self, body):
+        self.send_response(200)
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), CannedHandler)
+    httpd.connections = set()
+    httpd.history = list()
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def local_internet(server):
+    return Internet(base_url=f"http://127.0.0.1:{server.server_address[1]}")
+
+
+def test_get_pages_is_concurrent(server):
+    internet = local_internet(server)
+    pages = ["/wiki/A", "/wiki/B", "/wiki/C", "/wiki/D", "/wiki/E", "/wiki/A"]
+    start = time.perf_counter()
+    htmls = internet.get_pages(pages)
+    elapsed = time.perf_counter() - start
+    assert htmls[1] == '<a href="/wiki/E">/wiki/E</a>'
+    assert htmls[0] == htmls[5]
+    assert internet.requests == pages
+    assert elapsed < 5 * LATENCY / 2
+
+
+def test_get_page_reuses_connection(server):
+    internet = local_internet(server)
+    internet.get_page("/wiki/A")
+    internet.get_page("/wiki/B")
+    assert internet.get_page("/wiki/Missing") == "ERROR"
+    assert len(server.connections) == 1
+
+
+def test_get_random_follows_redirect(server):
+    internet = local_internet(server)
+    assert internet.get_random() == internet.get_page("/wiki/A")
+    assert internet.requests == ["Random", "/wiki/A"]
+
+
+def test_bfs_prefetch(server):
+    internet = local_internet(server)
+    start = time.perf_counter()
+    path = BFSProblem(internet, prefetch=8).bfs(source="/wiki/A", goal="/wiki/Goal")
+    elapsed = time.perf_counter() - start
+    assert path == ["/wiki/A", "/wiki/B", "/wiki/E", "/wiki/Goal"]
+    assert internet.requests == ["/wiki/A", "/wiki/B", "/wiki/C", "/wiki/D", "/wiki/E"]
+    assert elapsed < 5 * LATENCY
+
+
+def test_stream_page(server):
+    internet = local_internet(server)
+    chunks = list(internet.stream_page("/wiki/A", chunk_size=8))
+    assert "".join(chunks) == '<a href="/wiki/B">/wiki/B</a><a href="/wiki/C">/wiki/C</a><a href="/wiki/D">/wiki/D</a>'
+    assert len(chunks) > 1
+    assert internet.cache.get("/wiki/A") == "".join(chunks)
+    assert list(internet.stream_page("/wiki/A")) == ["".join(chunks)]
+    assert list(internet.stream_page("/wiki/Missing")) == ["ERROR"]
+
+    # Stopping part way still reads and caches the whole page, so it is never downloaded twice.
+    stream = internet.stream_page("/wiki/B", chunk_size=1)
+    next(stream)
+    stream.close()
+    assert internet.cache.get("/wiki/B") == '<a href="/wiki/E">/wiki/E</a>'
+    assert list(internet.stream_page("/wiki/B")) == ['<a href="/wiki/E">/wiki/E</a>']
+    assert internet.get_page("/wiki/C") == '<a href="/wiki/F">/wiki/F</a>'
+    assert internet.requests == ["/wiki/A", "/wiki/A", "/wiki/Missing", "/wiki/B", "/wiki/B", "/wiki/C"]
+
+
+def test_revisions_are_resolved_once(server, tmp_path):
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    revisions = RevisionCache(tmp_path / "revisions.sqlite")
+    internet = Internet(at_time="20100401000000", base_url=base_url, revisions=revisions)
+    assert internet.get_page("/wiki/A") == '<a href="/wiki/B">/wiki/B</a><a href="/wiki/C">/wiki/C</a><a href="/wiki/D">/wiki/D</a>'
+    assert internet.get_page("/wiki/Missing") == "ERROR"
+    assert server.history == ["A", "Missing"]
+    assert revisions.revisions("20100401000000") == {"/wiki/A": "11"}
+
+    # A fresh page cache (or process) still knows A's revision.
+    internet = Internet(at_time="20100401000000", base_url=base_url, cache=DirectoryCacheStore(tmp_path / "other"),
+                        revisions=RevisionCache(tmp_path / "revisions.sqlite"))
+    assert internet.get_page("/wiki/A").startswith('<a href="/wiki/B">')
+    assert server.history == ["A", "Missing"]
+
+
+def test_resolve_revisions_is_concurrent(server):
+    internet = Internet(at_time="20100401000000", base_url=f"http://127.0.0.1:{server.server_address[1]}", revisions=RevisionCache())
+    start = time.perf_counter()
+    oldids = internet.resolve_revisions(["/wiki/A", "/wiki/B", "/wiki/C", "/wiki/D", "/wiki/E", "/wiki/A"])
+    assert time.perf_counter() - start < 5 * LATENCY / 2
+    assert oldids == {"/wiki/A": "11", "/wiki/B": "11", "/wiki/C": "11", "/wiki/D": "11", "/wiki/E": "11"}
+    assert internet.requests == []
+    internet.get_pages(["/wiki/A", "/wiki/B"])
+    assert sorted(server.history) == ["A", "B", "C", "D", "E"]
+
+
+def test_snapshot_pins_at_time(tmp_path, monkeypatch):
+    internet = Internet.snapshot(revisions=RevisionCache())
+    assert len(internet.at_time) == 14 and internet.at_time.isdigit()
+
+    # Later runs (and other processes) race against the same pinned revision set until it is refreshed.
+    revisions = RevisionCache(tmp_path / "revisions.sqlite")
+    monkeypatch.setattr("py_wikiracer.internet.snapshot_time", lambda: "20200101000000")
+    assert Internet.snapshot(revisions=revisions).at_time == "20200101000000"
+    monkeypatch.setattr("py_wikiracer.internet.snapshot_time", lambda: "20300101000000")
+    assert Internet.snapshot(revisions=RevisionCache(tmp_path / "revisions.sqlite")).at_time == "20200101000000"
+    assert pinned_snapshot(revisions=revisions) == "20200101000000"
+    assert Internet.snapshot(revisions=revisions, refresh=True).at_time == "20300101000000"
+    assert RevisionCache(tmp_path / "revisions.sqlite").pinned("latest") == "20300101000000"
+    assert Internet.snapshot("other", revisions=revisions).at_time == "20300101000000"
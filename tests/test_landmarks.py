@@ -0,0 +1,52 @@
+import random
+
+from py_wikiracer.landmarks import Landmarks, build_landmarks
+from py_wikiracer.link_graph import LinkGraph, LinkGraphInternet, build_link_graph
+from py_wikiracer.wikiracer import DijkstrasProblem
+
+
+def synthetic_graph(path, n=300, degree=3, hubs=10):
+    # A random graph where about a third of the links point at a few hub pages, as on Wikipedia.
+    rng = random.Random(0)
+    links = dict()
+    for i in range(n):
+        targets = (rng.randrange(hubs) if rng.random() < 0.3 else rng.randrange(n) for _ in range(degree))
+        links[f"/wiki/Node_{i}"] = list(dict.fromkeys(f"/wiki/Node_{target}" for target in targets))
+    build_link_graph(links, path)
+    return LinkGraph(path)
+
+
+def test_lower_bound_is_admissible(tmp_path):
+    graph = synthetic_graph(tmp_path / "graph")
+    build_landmarks(graph, tmp_path / "landmarks", count=4)
+    landmarks = Landmarks(graph, tmp_path / "landmarks")
+    rng = random.Random(0)
+    for _ in range(200):
+        source, goal = rng.randrange(len(graph)), rng.randrange(len(graph))
+        if source == goal:
+            continue
+        path = graph.shortest_path(graph.title(source), graph.title(goal))
+        bound = landmarks.lower_bound(source, goal)
+        if path is None:
+            continue
+        assert bound <= len(path) - 1
+    landmarks.close()
+    graph.close()
+
+
+def test_astar_finds_shortest_paths(tmp_path):
+    graph = synthetic_graph(tmp_path / "graph")
+    build_landmarks(graph, tmp_path / "landmarks", count=8)
+    landmarks = Landmarks(graph, tmp_path / "landmarks")
+    rng = random.Random(1)
+    for _ in range(30):
+        source, goal = graph.title(rng.randrange(len(graph))), graph.title(rng.randrange(len(graph)))
+        shortest = graph.shortest_path(source, goal)
+        path = DijkstrasProblem(LinkGraphInternet(graph)).dijkstras(source, goal, costFn = lambda x, y: 1,
+                                                                      heuristicFn = landmarks.heuristic(goal))
+        assert (path is None) == (shortest is None)
+        if path is not None:
+            assert len(path) == len(shortest)
+            assert all(b in graph.get_links(a) for a, b in zip(path, path[1:]))
+    landmarks.close()
+    graph.close()
@@ -0,0 +1,50 @@
+from py_wikiracer.link_cache import LinkCache
+from py_wikiracer.wikiracer import BFSProblem, CachedInternet
+from tests.test_search import GraphInternet, GRAPH
+
+
+def test_lru_eviction():
+    cache = LinkCache(max_entries=2)
+    cache.put("/wiki/A", None, ["/wiki/B"])
+    cache.put("/wiki/B", None, ["/wiki/C"])
+    assert cache.get("/wiki/A", None) == ["/wiki/B"]
+    cache.put("/wiki/C", None, [])
+    assert cache.get("/wiki/B", None) == None
+    assert cache.get("/wiki/C", None) == []
+    assert cache.get("/wiki/A", "20100401000000") == None
+    assert cache.stats() == {"hits": 2, "sidecar_hits": 0, "misses": 2, "evictions": 1,
+                             "entries": 2, "bytes": LinkCache.size_of(["/wiki/B"])}
+
+
+def test_byte_bound():
+    links = [f"/wiki/Link_{i}" for i in range(100)]
+    cache = LinkCache(max_bytes=LinkCache.size_of(links) * 2)
+    for page in ("/wiki/A", "/wiki/B", "/wiki/C"):
+        cache.put(page, None, links)
+    assert len(cache) == 2
+    assert cache.bytes <= cache.max_bytes
+    assert cache.get("/wiki/A", None) == None
+
+
+def test_sidecar_persists(tmp_path):
+    cache = LinkCache(path=tmp_path / "links.sqlite")
+    cache.put("/wiki/A", None, ["/wiki/B", "/wiki/C"])
+    cache.put("/wiki/Empty", None, [])
+    cache.close()
+    cache = LinkCache(path=tmp_path / "links.sqlite")
+    assert cache.get("/wiki/A", None) == ["/wiki/B", "/wiki/C"]
+    assert cache.get("/wiki/A", None) == ["/wiki/B", "/wiki/C"]
+    assert cache.get("/wiki/Empty", None) == []
+    assert (cache.sidecar_hits, cache.hits, cache.misses) == (2, 1, 0)
+    cache.close()
+
+
+def test_cached_internet_parses_once():
+    graph_internet = GraphInternet(GRAPH)
+    cache = LinkCache()
+    internet = CachedInternet(graph_internet, cache)
+    assert BFSProblem(internet).bfs(source="/wiki/A", goal="/wiki/F") == ["/wiki/A", "/wiki/B", "/wiki/D", "/wiki/F"]
+    assert BFSProblem(internet).bfs(source="/wiki/A", goal="/wiki/F") == ["/wiki/A", "/wiki/B", "/wiki/D", "/wiki/F"]
+    assert graph_internet.requests == ["/wiki/A", "/wiki/B", "/wiki/C", "/wiki/D"]
+    assert internet.requests is graph_internet.requests
+    assert (cache.hits, cache.misses) == (4, 4)
@@ -0,0 +1,55 @@
+import base64
+
+from py_wikiracer.link_graph import LinkGraph, LinkGraphInternet, build_from_file_cache, build_link_graph
+from py_wikiracer.wikiracer import BFSProblem, DijkstrasProblem, WikiracerProblem
+
+GRAPH = {
+    "/wiki/A": ["/wiki/C", "/wiki/B"],
+    "/wiki/B": ["/wiki/D"],
+    "/wiki/C": ["/wiki/D", "/wiki/E"],
+    "/wiki/D": ["/wiki/Caf%C3%A9"],
+    "/wiki/E": ["/wiki/Caf%C3%A9", "/wiki/A"],
+}
+
+
+def test_link_graph_roundtrip(tmp_path):
+    build_link_graph(GRAPH, tmp_path / "graph")
+    graph = LinkGraph(tmp_path / "graph")
+    assert len(graph) == 6
+    assert graph.get_links("/wiki/A") == ["/wiki/C", "/wiki/B"]
+    assert graph.get_links("/wiki/Caf%C3%A9") == []
+    assert graph.get_links("/wiki/Missing") == []
+    assert graph.get_backlinks("/wiki/Caf%C3%A9") == ["/wiki/D", "/wiki/E"]
+    assert graph.title(graph.id("/wiki/E")) == "/wiki/E"
+    assert graph.shortest_path("/wiki/A", "/wiki/Caf%C3%A9") == ["/wiki/A", "/wiki/C", "/wiki/D", "/wiki/Caf%C3%A9"]
+    assert graph.shortest_path("/wiki/B", "/wiki/A") == None
+    graph.close()
+
+
+def test_searches_on_link_graph(tmp_path):
+    build_link_graph(GRAPH, tmp_path / "graph")
+    graph = LinkGraph(tmp_path / "graph")
+
+    bfs_internet = LinkGraphInternet(graph)
+    assert BFSProblem(bfs_internet).bfs(source="/wiki/A", goal="/wiki/Caf%C3%A9") == ["/wiki/A", "/wiki/C", "/wiki/D", "/wiki/Caf%C3%A9"]
+    assert bfs_internet.requests == ["/wiki/A", "/wiki/C", "/wiki/B", "/wiki/D"]
+
+    dij_internet = LinkGraphInternet(graph)
+    assert DijkstrasProblem(dij_internet).dijkstras(source="/wiki/B", goal="/wiki/E") == None
+    assert dij_internet.requests == ["/wiki/B", "/wiki/D", "/wiki/Caf%C3%A9"]
+
+    racer_internet = LinkGraphInternet(graph)
+    assert WikiracerProblem(racer_internet, graph).wikiracer(source="/wiki/A", goal="/wiki/Caf%C3%A9") == ["/wiki/A", "/wiki/C", "/wiki/D", "/wiki/Caf%C3%A9"]
+    graph.close()
+
+
+def test_build_from_file_cache(tmp_path):
+    cache = tmp_path / "wiki_cache"
+    cache.mkdir()
+    for page, links in GRAPH.items():
+        name = base64.urlsafe_b64encode(f"{page[6:]}:None".encode("utf-8")).decode("utf-8")
+        (cache / name).write_text("".join(f'<a href="{link}">x</a>' for link in links), encoding="utf-8")
+    build_from_file_cache(tmp_path / "graph", cache_dir=cache)
+    graph = LinkGraph(tmp_path / "graph")
+    assert graph.get_links("/wiki/E") == ["/wiki/Caf%C3%A9", "/wiki/A"]
+    graph.close()
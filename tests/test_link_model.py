@@ -0,0 +1,52 @@
+from py_wikiracer.heuristics import LinkModel, TierHeuristic
+from py_wikiracer.link_graph import LinkGraph, build_link_graph
+from py_wikiracer.link_model import graph_features, pagerank, read_paths, train_link_model
+
+GRAPH = {
+    "/wiki/A": ["/wiki/Hub"],
+    "/wiki/B": ["/wiki/Hub"],
+    "/wiki/C": ["/wiki/Hub", "/wiki/A"],
+    "/wiki/Hub": ["/wiki/A", "/wiki/B", "/wiki/C", "/wiki/D"],
+}
+
+
+def test_pagerank(tmp_path):
+    build_link_graph(GRAPH, tmp_path)
+    graph = LinkGraph(tmp_path)
+    rank = pagerank(graph)
+    assert abs(sum(rank) - 1) < 1e-9
+    assert max(range(len(rank)), key=rank.__getitem__) == graph.id("/wiki/Hub")
+    features = graph_features(graph)
+    assert features["/wiki/Hub"][0] > 0 and features["/wiki/Hub"][1] > 0
+    assert "/wiki/D" not in features
+    graph.close()
+
+
+def test_train_link_model(tmp_path):
+    links = {"/wiki/S": ["/wiki/Good_Way", "/wiki/Bad_Way", "/wiki/Other"]}
+    paths = [["/wiki/S", "/wiki/Good_Way", "/wiki/Goal"]] * 20
+    model = train_link_model(paths, lambda page: links.get(page, []))
+    assert model.score("/wiki/Good_Way") > 0.5 > model.score("/wiki/Bad_Way")
+    assert model.score("/wiki/Way") > model.score("/wiki/Unseen")
+
+    model.save(tmp_path / "model.json")
+    loaded = LinkModel.load(tmp_path / "model.json")
+    assert loaded.score("/wiki/Good_Way") == model.score("/wiki/Good_Way")
+    assert read_paths(['{"source": "/wiki/S", "path": ["/wiki/S", "/wiki/Goal"]}', '{"path": null}', '']) == [["/wiki/S", "/wiki/Goal"]]
+
+
+def test_tiers_with_model():
+    model = LinkModel(weights = {"good": 5.0, "bad": -5.0})
+    heuristic = TierHeuristic(common = set(), good = set(), near = {"/wiki/Good_Near"}, useful = set(),
+                              goal_neighborhood = set(), keywords = set(), model = model)
+    assert heuristic.score("/wiki/Good_Near") == 0.1
+    assert heuristic.score("/wiki/Good") < heuristic.score("/wiki/Other") < heuristic.score("/wiki/Bad") <= 10000
+
+
+def test_model_keeps_tier_order():
+    model = LinkModel(weights = {"crystal": 30.0, "lake": 30.0, "far": -90.0, "other": 30.0})
+    heuristic = TierHeuristic(common = set(), good = set(), near = set(), useful = set(),
+                              goal_neighborhood = {"/wiki/Two_Steps"}, keywords = {"Lake"}, model = model)
+    scores = [heuristic.score(page) for page in ["/wiki/Two_Steps", "/wiki/Crystal_Lake", "/wiki/Far_Lake", "/wiki/Other", "/wiki/Unseen"]]
+    assert scores[0] == 10
+    assert 10 < scores[1] < scores[2] <= 100 < scores[3] < scores[4] <= 10000
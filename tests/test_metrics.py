@@ -0,0 +1,62 @@
+import json
+
+from py_wikiracer.cache_store import DirectoryCacheStore
+from py_wikiracer.internet import Internet
+from py_wikiracer.metrics import Metrics
+from py_wikiracer.wikiracer import BFSProblem, DFSProblem, DijkstrasProblem, CachedInternet, FindInPageProblem
+from tests.test_search import GraphInternet, GRAPH, HTMLInternet
+
+
+def test_bfs_metrics():
+    metrics = Metrics(trace=True)
+    internet = GraphInternet(GRAPH)
+    BFSProblem(internet, metrics=metrics).bfs(source="/wiki/A", goal="/wiki/F")
+    summary = json.loads(metrics.to_json())
+    assert summary["counters"]["nodes_expanded"] == len(internet.requests)
+    assert summary["peaks"]["frontier"] == 2
+    assert set(summary["timers"]) == {"fetch", "parse"}
+    assert [event["page"] for event in summary["events"]] == internet.requests
+
+
+def test_dfs_metrics():
+    metrics = Metrics()
+    internet = GraphInternet(GRAPH)
+    DFSProblem(internet, metrics=metrics).dfs(source="/wiki/A", goal="/wiki/F")
+    summary = metrics.summary()
+    assert summary["counters"]["nodes_expanded"] == len(internet.requests)
+    assert summary["peaks"]["frontier"] == 3
+    assert set(summary["timers"]) == {"fetch", "parse"}
+
+
+def test_dijkstras_metrics():
+    metrics = Metrics()
+    internet = CachedInternet(GraphInternet(GRAPH), metrics=metrics)
+    DijkstrasProblem(internet, metrics=metrics).dijkstras(source="/wiki/A", goal="/wiki/F")
+    summary = metrics.summary()
+    assert {"heap", "heuristic", "fetch", "parse"} <= set(summary["timers"])
+    assert summary["counters"]["link_cache_misses"] == summary["counters"]["nodes_expanded"] == 4
+    assert "events" not in summary
+
+
+def test_find_in_page_metrics():
+    metrics = Metrics()
+    pages = {"/wiki/A": '<a href="/wiki/B">B</a> <a href="/wiki/C">ham</a>', "/wiki/C": "ham and cheese"}
+    internet = HTMLInternet(pages)
+    FindInPageProblem(internet, metrics=metrics).find_in_page(source="/wiki/A", query=["ham", "cheese"])
+    summary = metrics.summary()
+    assert internet.requests == ["/wiki/A", "/wiki/C"]
+    assert summary["counters"]["nodes_expanded"] == 2
+    assert summary["counters"]["bytes_parsed"] == len(pages["/wiki/A"]) + len(pages["/wiki/C"])
+    assert summary["peaks"]["frontier"] == 2
+    assert set(summary["timers"]) == {"fetch", "parse"}
+
+
+def test_internet_metrics(tmp_path):
+    metrics = Metrics()
+    store = DirectoryCacheStore(tmp_path)
+    store.put("/wiki/A", None, "<html></html>")
+    internet = Internet(cache=store, metrics=metrics)
+    internet.get_page("/wiki/A")
+    internet.get_page("/wiki/A")
+    assert metrics.counters["cache_hits"] == 2
+    assert metrics.timers["cache_read"] > 0
@@ -0,0 +1,57 @@
+from benchmarks.suite import CappedInternet, RequestLimit, compare
+from py_wikiracer.cache_store import DirectoryCacheStore
+from py_wikiracer.offline import OfflineInternet, ScaleFreeInternet
+from py_wikiracer.wikiracer import BFSProblem, DijkstrasProblem
+
+import pytest
+
+
+def test_offline_internet_serves_recorded_pages(tmp_path):
+    cache = DirectoryCacheStore(tmp_path)
+    cache.put("/wiki/A", None, '<a href="/wiki/B">B</a>')
+    cache.put("/wiki/B", None, '<a href="/wiki/A">A</a>')
+    internet = OfflineInternet(cache)
+    assert BFSProblem(internet).bfs("/wiki/A", "/wiki/B") == ["/wiki/A", "/wiki/B"]
+    assert internet.requests == ["/wiki/A"]
+    assert internet.get_page("/wiki/Missing") == "ERROR"
+    assert internet.get_random() in (cache.get("/wiki/A"), cache.get("/wiki/B"))
+
+
+def test_scale_free_internet_is_deterministic():
+    a, b = ScaleFreeInternet(10 ** 7), ScaleFreeInternet(10 ** 7)
+    assert a.links("/wiki/P123") == b.links("/wiki/P123")
+    assert a.race_suite(3, 2) == b.race_suite(3, 2)
+    assert a.get_random() == b.get_random()
+
+
+def test_race_suite_is_solvable():
+    internet = ScaleFreeInternet(10 ** 4)
+    for source, goal in internet.race_suite(5, 3):
+        path = DijkstrasProblem(ScaleFreeInternet(10 ** 4)).dijkstras(source, goal, costFn=lambda x, y: 1)
+        assert path[0] == source and path[-1] == goal
+        assert len(path) - 1 <= 3
+
+
+def test_capped_internet():
+    internet = CappedInternet(ScaleFreeInternet(10 ** 4), limit=2)
+    internet.get_page("/wiki/P1")
+    internet.get_page("/wiki/P2")
+    with pytest.raises(RequestLimit):
+        internet.get_page("/wiki/P3")
+
+
+def test_compare_flags_regressions():
+    baseline = {"s": {"bfs": {"races": 5, "seconds": 1.0, "downloads": 100, "peak_rss_kb": 1000, "clicks": 12, "solved": 5}}}
+    current = {"s": {"bfs": {"races": 5, "seconds": 1.05, "downloads": 150, "peak_rss_kb": 1000, "clicks": 10, "solved": 4}}}
+    regressions = compare(baseline, current)
+    assert len(regressions) == 2
+    assert any("downloads" in line for line in regressions)
+    assert any("solved" in line for line in regressions)
+
+
+def test_compare_averages_over_solved_races():
+    baseline = {"s": {"racer": {"races": 5, "seconds": 1.0, "downloads": 100, "peak_rss_kb": 1000, "clicks": 12, "solved": 4}}}
+    current = {"s": {"racer": {"races": 5, "seconds": 1.0, "downloads": 100, "peak_rss_kb": 1000, "clicks": 15, "solved": 5}}}
+    assert compare(baseline, current) == []
+    current["s"]["racer"]["clicks"] = 20
+    assert compare(baseline, current) == ["s racer clicks per solved race: 3 -> 4"]
@@ -0,0 +1,77 @@
+from functools import partial
+
+import pytest
+from py_wikiracer.cache_store import DirectoryCacheStore
+from py_wikiracer.offline import OfflineInternet, ScaleFreeInternet
+from py_wikiracer.parallel import ParallelInternet
+from py_wikiracer.wikiracer import BFSProblem, DijkstrasProblem, WikiracerProblem
+
+
+class FailingInternet(ScaleFreeInternet):
+    # Module level, so that worker processes can unpickle it.
+    def get_page(self, page):
+        if page == "/wiki/P2":
+            raise OSError("connection reset")
+        return super().get_page(page)
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    synthetic = ScaleFreeInternet(400, mean_degree=6)
+    cache = DirectoryCacheStore(tmp_path / "cache")
+    for i in range(synthetic.n):
+        cache.put(f"/wiki/P{i}", None, synthetic.render(f"/wiki/P{i}"))
+    return partial(OfflineInternet, cache), synthetic.race_suite(5, 3)
+
+
+SEARCHES = {
+    "bfs": lambda internet, prefetch, source, goal: BFSProblem(internet, prefetch = prefetch).bfs(source, goal),
+    "dijkstra": lambda internet, prefetch, source, goal: DijkstrasProblem(internet, prefetch = prefetch).dijkstras(source, goal),
+    "racer": lambda internet, prefetch, source, goal: WikiracerProblem(internet, prefetch = prefetch).wikiracer(source, goal),
+}
+
+
+@pytest.mark.parametrize("search", sorted(SEARCHES))
+def test_parallel_matches_sequential(corpus, search):
+    internet_factory, races = corpus
+    for source, goal in races:
+        sequential = internet_factory()
+        expected = SEARCHES[search](sequential, 0, source, goal)
+        parallel = ParallelInternet(internet_factory, workers = 2)
+        try:
+            assert SEARCHES[search](parallel, 8, source, goal) == expected
+            assert parallel.requests == sequential.requests
+        finally:
+            parallel.close()
+
+
+def test_parallel_get_links(corpus):
+    internet_factory, _ = corpus
+    parallel = ParallelInternet(internet_factory, workers = 2)
+    try:
+        parallel.prefetch(["/wiki/P1", "/wiki/P2", "/wiki/P3"])
+        assert parallel.requests == []
+        assert parallel.get_links("/wiki/P2") == ScaleFreeInternet(400, mean_degree=6).links("/wiki/P2")
+        assert parallel.get_links("/wiki/P9") == ScaleFreeInternet(400, mean_degree=6).links("/wiki/P9")
+        assert parallel.requests == ["/wiki/P2", "/wiki/P9"]
+        with pytest.raises(ValueError):
+            parallel.get_links("/wiki/File:X.png")
+    finally:
+        parallel.close()
+
+
+def test_parallel_page_error():
+    """
+    A page that fails raises when its links are asked for, without losing the rest of its batch.
+    """
+    expected = ScaleFreeInternet(400, mean_degree=6)
+    parallel = ParallelInternet(partial(FailingInternet, 400, mean_degree=6), workers = 1)
+    try:
+        parallel.prefetch(["/wiki/P1", "/wiki/P2", "/wiki/P3"])
+        with pytest.raises(OSError):
+            parallel.get_links("/wiki/P2")
+        assert parallel.get_links("/wiki/P1") == expected.links("/wiki/P1")
+        assert parallel.get_links("/wiki/P9") == expected.links("/wiki/P9")
+        assert parallel.get_links("/wiki/P3") == expected.links("/wiki/P3")
+    finally:
+        parallel.close()
@@ -9,7 +9,10 @@ from urllib.request import urlopen
 
 import pytest
 from py_wikiracer.internet import Internet
-from py_wikiracer.wikiracer import Parser, BFSProblem, DFSProblem, DijkstrasProblem, WikiracerProblem
+from py_wikiracer.wikiracer import Parser, BFSProblem, DFSProblem, DijkstrasProblem, WikiracerProblem, BidirectionalProblem, FindInPageProblem, CachedInternet, html_parser_links
+from py_wikiracer.query_matcher import QueryMatcher
+from py_wikiracer.backlinks import BacklinkIndex
+from py_wikiracer.search_state import SearchState
 
 def test_parser():
     internet = Internet()
@@ -26,6 +29,55 @@ def test_parser():
                                               '/wiki/Crystal_Lake,_Illinois']
 
 
+
+def test_parser_matches_html_parser():
+    """
+    The link scanner should agree with a full HTMLParser pass, including on markup it has to skip.
+    """
+    html = """<html><head><style>a{}</style><script>var s = "<a href='/wiki/Script'>";</script></head>
+    <body><a href="/wiki/Main_Page" title="x>y">M</a><abbr href="/wiki/Abbr">x</abbr>
+    <!-- <a href="/wiki/Commented"> -->
+    <A CLASS=x HREF='/wiki/AT&amp;T'>t</A><a data-href="/wiki/Data" href="/wiki/Real">r</a>
+    <a
+     href = /wiki/Unquoted>u</a><a href="/wiki/File:X.png">f</a><a href="/wiki/X#y">h</a>
+    <a href="https://en.wikipedia.org/wiki/Ext">e</a><a href="/wiki/Main_Page">dup</a><a href="">e</a><a>n</a>
+    <a href="/wiki/Gabby_Giffords_Won%27t_Back_Down">g</a></body></html>"""
+    assert Parser.get_links_in_page(html) == html_parser_links(html)
+    assert Parser.get_links_in_page(html) == ['/wiki/Main_Page', '/wiki/AT&T', '/wiki/Real', '/wiki/Unquoted',
+                                              '/wiki/Gabby_Giffords_Won%27t_Back_Down']
+
+
+def test_streamed_links_match_full_scan():
+    """
+    Scanning a page in chunks of any size finds exactly the links of a full scan, even when chunks split tags, comments or scripts.
+    """
+    html = """<html><head><style>a{}</style><script>var s = "<a href='/wiki/Script'>";</script></head>
+    <body><a href="/wiki/Main_Page" title="x>y">M</a><!-- <a href="/wiki/Commented"> --><a href='/wiki/AT&amp;T'>t</a>
+    <SCRIPT>"<a href='/wiki/Upper'>"</SCRIPT><a href = /wiki/Unquoted>u</a><a href="/wiki/Main_Page">dup</a>
+    <p>x</p><a title="x<y" href="/wiki/Z">z</a><p title='1 < 2'>tail</p><a href="/wiki/After">a</a></body></html>"""
+    expected = Parser.get_links_in_page(html)
+    assert list(Parser.iter_links_in_page(html)) == expected
+    for size in range(1, len(html) + 1):
+        chunks = (html[i:i + size] for i in range(0, len(html), size))
+        assert list(Parser.iter_links_in_chunks(chunks)) == expected
+
+
+def test_streamed_links_match_full_scan_on_malformed_pages():
+    """
+    Chunked and full scans agree on random, mostly malformed markup: unclosed quotes, comments,
+    scripts and CDATA sections, stray "<a", and so on.
+    """
+    pieces = ['<a href="/wiki/A">', "<a href='/wiki/B'>", '<a href=/wiki/C>', '<a title="x<y" href="/wiki/D">', '<a"', '<a ',
+              'href=', '/wiki/E', '"', "'", '<', '>', ' ', '\n', '<!--', '-->', '<script>', '</script>', '<STYLE', '</style >',
+              '<![CDATA[', ']]>', '<p>', 'text']
+    rng = random.Random(0)
+    for _ in range(3000):
+        html = "".join(rng.choice(pieces) for _ in range(rng.randint(1, 30)))
+        size = rng.randint(1, 40)
+        chunks = (html[i:i + size] for i in range(0, len(html), size))
+        assert list(Parser.iter_links_in_chunks(chunks)) == Parser.get_links_in_page(html), (html, size)
+
+
 def test_trivial():
     """
     All pages contain a link to themselves, which any search algorithm should recognize.
@@ -116,6 +168,257 @@ class CustomInternet():
         return f'<a href="{page}"></a>'
 
 
+class GraphInternet():
+    def __init__(self, graph):
+        self.graph = graph
+        self.requests = []
+    def get_page(self, page):
+        self.requests.append(page)
+        return "".join(f'<a href="{link}"></a>' for link in self.graph.get(page, []))
+
+
+GRAPH = {
+    "/wiki/A": ["/wiki/B", "/wiki/C"],
+    "/wiki/B": ["/wiki/D"],
+    "/wiki/C": ["/wiki/D", "/wiki/E"],
+    "/wiki/D": ["/wiki/F"],
+    "/wiki/E": ["/wiki/F"],
+}
+
+
+def test_searches_on_graph():
+    """
+    Offline searches over a small diamond-shaped graph.
+    """
+    bfs_internet = GraphInternet(GRAPH)
+    dfs_internet = GraphInternet(GRAPH)
+    dij_internet = GraphInternet(GRAPH)
+
+    assert BFSProblem(bfs_internet).bfs(source = "/wiki/A", goal = "/wiki/F") == ["/wiki/A", "/wiki/B", "/wiki/D", "/wiki/F"]
+    assert DFSProblem(dfs_internet).dfs(source = "/wiki/A", goal = "/wiki/F") == ["/wiki/A", "/wiki/C", "/wiki/E", "/wiki/F"]
+    assert DijkstrasProblem(dij_internet).dijkstras(source = "/wiki/A", goal = "/wiki/F") == ["/wiki/A", "/wiki/B", "/wiki/D", "/wiki/F"]
+
+    assert bfs_internet.requests[:3] == ["/wiki/A", "/wiki/B", "/wiki/C"]
+    assert dfs_internet.requests == ["/wiki/A", "/wiki/C", "/wiki/E"]
+    assert dij_internet.requests == ["/wiki/A", "/wiki/B", "/wiki/C", "/wiki/D"]
+
+
+def test_iddfs_on_graph():
+    """
+    Iterative deepening finds a shortest path and never downloads a page twice across rounds.
+    """
+    internet = GraphInternet(GRAPH)
+    dfs = DFSProblem(internet)
+    assert dfs.iddfs(source = "/wiki/A", goal = "/wiki/F") == ["/wiki/A", "/wiki/C", "/wiki/E", "/wiki/F"]
+    assert internet.requests == ["/wiki/A", "/wiki/C", "/wiki/B", "/wiki/E"]
+    assert DFSProblem(GraphInternet(GRAPH)).iddfs(source = "/wiki/A", goal = "/wiki/F", max_depth = 2) == None
+
+
+def test_iddfs_prunes_cycles():
+    """
+    A goal that cannot be reached ends the search once a round explores everything, whatever max_depth is.
+    """
+    internet = GraphInternet({"/wiki/A": ["/wiki/B"], "/wiki/B": ["/wiki/C", "/wiki/A"], "/wiki/C": ["/wiki/A", "/wiki/B"]})
+    assert DFSProblem(internet).iddfs(source = "/wiki/A", goal = "/wiki/Z", max_depth = 50) == None
+    assert sorted(internet.requests) == ["/wiki/A", "/wiki/B", "/wiki/C"]
+
+
+def test_bfs_fetches_each_page_once():
+    """
+    BFS marks pages when they are discovered, so a page linked from many others is only downloaded once.
+    """
+    graph = {
+        "/wiki/A": ["/wiki/B", "/wiki/C", "/wiki/Hub"],
+        "/wiki/B": ["/wiki/Hub", "/wiki/A"],
+        "/wiki/C": ["/wiki/Hub", "/wiki/B"],
+        "/wiki/Hub": ["/wiki/A", "/wiki/X"],
+    }
+    bfs_internet = GraphInternet(graph)
+    assert BFSProblem(bfs_internet).bfs(source = "/wiki/A", goal = "/wiki/Z") == None
+    assert bfs_internet.requests == ["/wiki/A", "/wiki/B", "/wiki/C", "/wiki/Hub", "/wiki/X"]
+
+
+def test_dijkstras_lazy_deletion():
+    """
+    A page pushed again at a lower cost is only expanded once, and costFn is only called for neighbors that can improve.
+    """
+    graph = {"/wiki/A": ["/wiki/C", "/wiki/B"], "/wiki/B": ["/wiki/C", "/wiki/A"], "/wiki/C": ["/wiki/D", "/wiki/B"]}
+    weights = {("/wiki/A", "/wiki/C"): 10, ("/wiki/A", "/wiki/B"): 1, ("/wiki/B", "/wiki/C"): 1, ("/wiki/C", "/wiki/D"): 1}
+    calls = []
+    def costFn(x, y):
+        calls.append((x, y))
+        return weights[(x, y)]
+    dij_internet = GraphInternet(graph)
+    assert DijkstrasProblem(dij_internet).dijkstras(source = "/wiki/A", goal = "/wiki/Z", costFn = costFn) == None
+    assert dij_internet.requests == ["/wiki/A", "/wiki/B", "/wiki/C", "/wiki/D"]
+    assert calls == [("/wiki/A", "/wiki/C"), ("/wiki/A", "/wiki/B"), ("/wiki/B", "/wiki/C"), ("/wiki/C", "/wiki/D")]
+
+    dij_internet = GraphInternet(graph)
+    assert DijkstrasProblem(dij_internet).dijkstras(source = "/wiki/A", goal = "/wiki/Z", costFn = costFn,
+                                                    goalFn = lambda page: page.endswith("D")) == ["/wiki/A", "/wiki/B", "/wiki/C", "/wiki/D"]
+
+
+def test_dijkstras_batch_costs():
+    """
+    With costsFn, each expanded page's links are scored in one call and the search is unchanged.
+    """
+    graph = {"/wiki/A": ["/wiki/C", "/wiki/B"], "/wiki/B": ["/wiki/C", "/wiki/A"], "/wiki/C": ["/wiki/D", "/wiki/B"]}
+    weights = {("/wiki/A", "/wiki/C"): 10, ("/wiki/A", "/wiki/B"): 1, ("/wiki/B", "/wiki/C"): 1, ("/wiki/C", "/wiki/D"): 1}
+    batches = []
+    def costsFn(page, links):
+        batches.append(page)
+        return [weights.get((page, link), 100) for link in links]
+    dij_internet = GraphInternet(graph)
+    assert DijkstrasProblem(dij_internet).dijkstras(source = "/wiki/A", goal = "/wiki/Z", costFn = None, costsFn = costsFn,
+                                                    goalFn = lambda page: page.endswith("D")) == ["/wiki/A", "/wiki/B", "/wiki/C", "/wiki/D"]
+    assert batches == dij_internet.requests == ["/wiki/A", "/wiki/B", "/wiki/C"]
+
+
+def test_bidirectional():
+    """
+    Bidirectional search meets in the middle using backlinks, downloading far fewer pages than BFS.
+    """
+    graph = {"/wiki/S": [f"/wiki/N{i}" for i in range(20)]}
+    for i in range(20):
+        graph[f"/wiki/N{i}"] = [f"/wiki/M{i}_{j}" for j in range(5)]
+    graph["/wiki/M7_3"] = ["/wiki/X"]
+    graph["/wiki/X"] = ["/wiki/Goal"]
+    backlinks = BacklinkIndex.from_forward_links(graph)
+    assert backlinks.get_backlinks("/wiki/X") == ["/wiki/M7_3"]
+
+    bfs_internet = GraphInternet(graph)
+    racer_internet = GraphInternet(graph)
+    expected = ["/wiki/S", "/wiki/N7", "/wiki/M7_3", "/wiki/X", "/wiki/Goal"]
+    assert BFSProblem(bfs_internet).bfs(source = "/wiki/S", goal = "/wiki/Goal") == expected
+    assert WikiracerProblem(racer_internet, backlinks).wikiracer(source = "/wiki/S", goal = "/wiki/Goal") == expected
+    assert racer_internet.requests == ["/wiki/S"]
+    assert len(bfs_internet.requests) > 50
+
+    # With X missing from the index, the backward search stops at once and the forward search finishes alone.
+    partial = BacklinkIndex.from_forward_links({page: links for page, links in graph.items() if page != "/wiki/X"})
+    partial_internet = GraphInternet(graph)
+    path = BidirectionalProblem(partial_internet, partial).bidirectional(source = "/wiki/N7", goal = "/wiki/Goal")
+    assert path == ["/wiki/N7", "/wiki/M7_3", "/wiki/X", "/wiki/Goal"]
+    assert partial_internet.requests[-1] == "/wiki/X"
+    assert WikiracerProblem(GraphInternet(graph), partial).wikiracer(source = "/wiki/S", goal = "/wiki/Goal") == expected
+
+    none_internet = GraphInternet(graph)
+    assert BidirectionalProblem(none_internet, backlinks).bidirectional(source = "/wiki/N1", goal = "/wiki/Goal") == None
+
+
+class HistoricalInternet(GraphInternet):
+    def __init__(self, graph):
+        super().__init__(graph)
+        self.at_time = "20100401000000"
+        self.layers = []
+    def resolve_revisions(self, pages):
+        self.layers.append(list(pages))
+        return {page: "1" for page in pages}
+
+
+def test_searches_resolve_revisions_by_layer():
+    """
+    On a historical Internet, every frontier layer has its revisions resolved in one call before it is fetched.
+    """
+    bfs_internet = HistoricalInternet(GRAPH)
+    dij_internet = HistoricalInternet(GRAPH)
+    assert BFSProblem(bfs_internet).bfs(source = "/wiki/A", goal = "/wiki/F") == ["/wiki/A", "/wiki/B", "/wiki/D", "/wiki/F"]
+    assert DijkstrasProblem(dij_internet).dijkstras(source = "/wiki/A", goal = "/wiki/F") == ["/wiki/A", "/wiki/B", "/wiki/D", "/wiki/F"]
+    assert bfs_internet.layers == dij_internet.layers == [["/wiki/A"], ["/wiki/B", "/wiki/C"], ["/wiki/D", "/wiki/E"]]
+
+    graph = {"/wiki/S": ["/wiki/M0", "/wiki/M1"], "/wiki/M1": ["/wiki/X"], "/wiki/X": ["/wiki/Goal"]}
+    bi_internet = HistoricalInternet(graph)
+    backlinks = BacklinkIndex.from_forward_links({"/wiki/S": graph["/wiki/S"]})
+    assert BidirectionalProblem(bi_internet, backlinks).bidirectional(source = "/wiki/S", goal = "/wiki/Goal") == ["/wiki/S", "/wiki/M1", "/wiki/X", "/wiki/Goal"]
+    assert bi_internet.layers == [["/wiki/S"], ["/wiki/M0", "/wiki/M1"], ["/wiki/X"]]
+
+    # Pages whose links are already cached are never fetched, so their revisions are not looked up.
+    links = CachedInternet(HistoricalInternet(GRAPH))
+    links.get_links("/wiki/A")
+    links.resolve_revisions(["/wiki/A", "/wiki/B"])
+    assert links.internet.layers == [["/wiki/B"]]
+
+
+class HTMLInternet():
+    def __init__(self, pages):
+        self.pages = pages
+        self.requests = []
+    def get_page(self, page):
+        self.requests.append(page)
+        return self.pages.get(page, "")
+
+
+class StreamingInternet(HTMLInternet):
+    def __init__(self, pages, chunk_size):
+        super().__init__(pages)
+        self.chunk_size = chunk_size
+        self.chunks_read = 0
+    def stream_page(self, page):
+        html = self.get_page(page)
+        for start in range(0, len(html), self.chunk_size):
+            self.chunks_read += 1
+            yield html[start:start + self.chunk_size]
+
+
+def test_searches_stop_reading_at_goal():
+    """
+    A streamed page is only read as far as the goal link.
+    """
+    filler = "".join(f'<a href="/wiki/Filler_{i}">f</a>' for i in range(1000))
+    pages = {"/wiki/A": '<a href="/wiki/Goal">g</a>' + filler}
+    for search in (lambda internet: BFSProblem(internet).bfs("/wiki/A", "/wiki/Goal"),
+                   lambda internet: DFSProblem(internet).dfs("/wiki/A", "/wiki/Goal"),
+                   lambda internet: DijkstrasProblem(internet).dijkstras("/wiki/A", "/wiki/Goal")):
+        internet = StreamingInternet(pages, 100)
+        assert search(internet) == ["/wiki/A", "/wiki/Goal"]
+        assert internet.chunks_read <= 2
+
+
+def test_find_in_page():
+    """
+    Links whose anchor text mentions a query word are downloaded first, and the search stops at the first full match.
+    """
+    pages = {
+        "/wiki/Sandwich": '<p>A sandwich may hold ham.</p><a href="/wiki/Bread">Bread</a> <a href="/wiki/Cheese_dairy">a <b>dairy</b></a>',
+        "/wiki/Bread": 'Bread <a href="/wiki/Flour">flour</a> with ham and cheese',
+        "/wiki/Cheese_dairy": 'Ham and cheese <a href="/wiki/Milk">milk</a> go together: ham, cheese',
+    }
+    internet = HTMLInternet(pages)
+    problem = FindInPageProblem(internet)
+    assert problem.find_in_page(source = "/wiki/Sandwich", query = ["ham", "cheese"]) == ["/wiki/Sandwich", "/wiki/Cheese_dairy"]
+    assert internet.requests == ["/wiki/Sandwich", "/wiki/Cheese_dairy"]
+    assert problem.downloads == 2
+    assert problem.chars_scanned < len(pages["/wiki/Sandwich"]) + len(pages["/wiki/Cheese_dairy"])
+
+    assert FindInPageProblem(HTMLInternet(pages)).find_in_page(source = "/wiki/Sandwich", query = ["ham", "bacon"]) == None
+    assert FindInPageProblem(HTMLInternet(pages)).find_in_page(source = "/wiki/Sandwich", query = ["sandwich"]) == ["/wiki/Sandwich"]
+
+
+def test_query_matcher():
+    matcher = QueryMatcher(["ab", "abc", "bcd", "x"])
+    assert matcher.scan("zzabcd") == {"ab", "abc", "bcd"}
+    assert matcher.scanned == 6
+    assert matcher.scan("abcd x and more") == {"ab", "abc", "bcd", "x"}
+    assert matcher.scanned == 6
+    assert Parser.get_anchors_in_page('<a href="/wiki/A">one <i>A</i></a><a href="/wiki/A">two</a>') == [("/wiki/A", "one A two")]
+
+
+def test_search_state_paths():
+    """
+    Paths are rebuilt from parent pointers, and titles are interned once.
+    """
+    state = SearchState()
+    root = state.push("/wiki/A")
+    first = state.push("/wiki/B", root)
+    second = state.push("/wiki/B", root)
+    leaf = state.push("/wiki/C", second)
+    assert state.path(root) == ["/wiki/A"]
+    assert state.path(first) == ["/wiki/A", "/wiki/B"]
+    assert state.path(leaf) == ["/wiki/A", "/wiki/B", "/wiki/C"]
+    assert state.titles == ["/wiki/A", "/wiki/B", "/wiki/C"]
+    assert len(state) == 4
+
+
 def test_none_on_fail():
     """
     Program should return None on failure